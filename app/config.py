@@ -17,6 +17,20 @@ class Settings(PydanticBaseSettings):
     postgres_user: str
     postgres_password: str
 
+    # Pool de connexions : le budget est partagé entre les workers uvicorn
+    web_concurrency: int = 1  # Nombre de workers (variable WEB_CONCURRENCY)
+    db_max_connections: int = 40  # Connexions max pour l'API, tous workers
+    db_pool_size: Optional[int] = None  # Force la taille du pool par worker
+    db_max_overflow: int = 5
+    db_pool_timeout: int = 30
+
+    # Réplicas en lecture (optionnel) : liste JSON d'URLs dans l'env
+    database_replica_urls: list[str] = []
+    db_replica_pool_size: Optional[int] = None  # Défaut : même budget que le primaire
+    db_replica_max_overflow: int = 5
+    # Après une écriture, les lectures du client restent sur le primaire
+    read_your_writes_seconds: int = 5
+
     # JWT
     secret_key: str
     algorithm: str = "HS256"
@@ -26,6 +40,24 @@ class Settings(PydanticBaseSettings):
     # Redis (optionnel)
     redis_url: Optional[str] = None
 
+    # Moteur d'analyse
+    stockfish_path: str = "/home/alexis/chessEngine/stockfish/stockfish"
+
+    # File de jobs moteur (optionnel) : /analyze et /ws/analyze passent par
+    # des workers séparés (Redis si redis_url, sinon worker dans l'API)
+    engine_queue: bool = False
+    engine_queue_max_jobs: int = 100  # Au-delà, l'API répond 503
+    engine_job_timeout: int = 30
+    engine_result_ttl: int = 60  # Résultats réutilisés pour la même position
+    engine_heartbeat_seconds: int = 5
+    engine_stream_depth: int = 24  # Profondeur max des analyses en streaming
+
+    # Synchronisation des comptes Chess.com / Lichess
+    chess_com_api_url: str = "https://api.chess.com/pub"
+    lichess_api_url: str = "https://lichess.org"
+    sync_max_concurrency: int = 4  # Comptes synchronisés en parallèle par fournisseur
+    sync_interval_seconds: int = 3600
+
     # CORS
     allowed_origins: list = ["http://localhost:5173", "http://localhost:8080"]
 
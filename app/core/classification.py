@@ -0,0 +1,247 @@
+"""
+Classification des coups (gaffe, erreur, imprécision, brillant) et précision
+
+Les calculs sont vectorisés avec NumPy sur une partie entière ou sur un lot
+de parties concaténées : aucune boucle Python par demi-coup.
+
+Usage: python -m app.core.classification  (parties déjà évaluées)
+"""
+
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.db.models.chess import ChessGame, GamePosition
+
+logger = logging.getLogger(__name__)
+
+# Seuils sur la baisse des chances de gain du joueur (en points de %)
+BLUNDER_THRESHOLD = 15.0
+MISTAKE_THRESHOLD = 10.0
+INACCURACY_THRESHOLD = 5.0
+# Heuristique : un coup qui améliore nettement les chances estimées avant
+# lui révèle une ressource que le moteur n'avait pas vue
+BRILLIANT_GAIN = 10.0
+
+
+@dataclass
+class BatchClassification:
+    """
+    Classification d'un lot de parties, à plat
+
+    Les tableaux par coup sont concaténés partie après partie ;
+    `move_offsets[i]:move_offsets[i + 1]` délimite les coups de la partie i
+    (le coup k de la partie est le demi-coup k + 1).
+    """
+
+    move_offsets: np.ndarray
+    win_loss: np.ndarray  # Baisse des chances de gain du joueur qui joue
+    accuracy: np.ndarray  # Précision de chaque coup (0-100)
+    is_blunder: np.ndarray
+    is_mistake: np.ndarray
+    is_inaccuracy: np.ndarray
+    is_brilliant: np.ndarray
+    accuracy_white: np.ndarray  # Par partie, NaN si aucun coup
+    accuracy_black: np.ndarray
+    blunders_count: np.ndarray  # Par partie
+
+    def __len__(self) -> int:
+        return len(self.move_offsets) - 1
+
+
+def win_percent(cp: np.ndarray) -> np.ndarray:
+    """Chances de gain (0-100) du point de vue des blancs"""
+    return 50 + 50 * (2 / (1 + np.exp(-0.00368208 * cp)) - 1)
+
+
+def move_accuracy(win_loss: np.ndarray) -> np.ndarray:
+    """Précision (0-100) d'un coup d'après la baisse des chances de gain"""
+    loss = np.maximum(win_loss, 0)
+    return np.clip(103.1668 * np.exp(-0.04354 * loss) - 3.1669, 0, 100)
+
+
+def classify_batch(series: Sequence[Sequence[int] | np.ndarray]) -> BatchClassification:
+    """
+    Classifier les coups d'un lot de parties
+
+    Args:
+        series: Évaluations de chaque partie (centipawns, POV blancs,
+            position initiale incluse, cf. `EngineEvaluation.evals`)
+
+    Returns:
+        BatchClassification: Résultats à plat pour tout le lot
+    """
+    n_games = len(series)
+    lengths = np.fromiter(
+        (len(evals) for evals in series), dtype=np.int64, count=n_games
+    )
+    flat = (
+        np.concatenate([np.asarray(evals, dtype=np.float64) for evals in series])
+        if n_games
+        else np.empty(0)
+    )
+    starts = np.cumsum(lengths) - lengths
+
+    # Chaque position, sauf la première de chaque partie, est atteinte par un coup
+    is_move = np.ones(len(flat), dtype=bool)
+    is_move[starts[lengths > 0]] = False
+    after = np.flatnonzero(is_move)
+    game_of_move = np.repeat(np.arange(n_games), lengths)[after]
+    white_to_move = (after - starts[game_of_move]) % 2 == 1
+
+    wp = win_percent(flat)
+    win_loss = wp[after - 1] - wp[after]
+    win_loss = np.where(white_to_move, win_loss, -win_loss)
+    accuracy = move_accuracy(win_loss)
+
+    is_blunder = win_loss >= BLUNDER_THRESHOLD
+    is_mistake = (win_loss >= MISTAKE_THRESHOLD) & ~is_blunder
+    is_inaccuracy = (win_loss >= INACCURACY_THRESHOLD) & (win_loss < MISTAKE_THRESHOLD)
+    is_brilliant = win_loss <= -BRILLIANT_GAIN
+
+    # Moyenne de précision par (partie, couleur) en une passe
+    side = game_of_move * 2 + white_to_move
+    totals = np.bincount(side, weights=accuracy, minlength=2 * n_games)
+    counts = np.bincount(side, minlength=2 * n_games)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (totals / counts).reshape(n_games, 2)
+
+    return BatchClassification(
+        move_offsets=np.concatenate([[0], np.cumsum(np.maximum(lengths - 1, 0))]),
+        win_loss=win_loss,
+        accuracy=accuracy,
+        is_blunder=is_blunder,
+        is_mistake=is_mistake,
+        is_inaccuracy=is_inaccuracy,
+        is_brilliant=is_brilliant,
+        accuracy_white=means[:, 1],
+        accuracy_black=means[:, 0],
+        blunders_count=np.bincount(game_of_move[is_blunder], minlength=n_games),
+    )
+
+
+def classify_game(evals: Sequence[int] | np.ndarray) -> BatchClassification:
+    """Classifier les coups d'une seule partie"""
+    return classify_batch([evals])
+
+
+def _nullable(value: float) -> float | None:
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def position_flags(
+    result: BatchClassification,
+    index: int,
+    half_move: int,
+) -> dict[str, bool] | None:
+    """
+    Drapeaux du coup qui mène à la position `half_move` de la partie `index`
+
+    Returns:
+        dict | None: Colonnes `is_*` de `GamePosition`, None hors de la partie
+    """
+    move = result.move_offsets[index] + half_move - 1
+    if half_move < 1 or move >= result.move_offsets[index + 1]:
+        return None
+    return {
+        "is_blunder": bool(result.is_blunder[move]),
+        "is_mistake": bool(result.is_mistake[move]),
+        "is_inaccuracy": bool(result.is_inaccuracy[move]),
+        "is_brilliant": bool(result.is_brilliant[move]),
+    }
+
+
+def store_position_flags(
+    db: Session,
+    game_ids: Sequence[int],
+    result: BatchClassification,
+) -> None:
+    """Écrire les drapeaux des `GamePosition` d'un lot (sans commit)"""
+    positions = db.execute(
+        select(GamePosition.id, GamePosition.game_id, GamePosition.half_move).where(
+            GamePosition.game_id.in_(game_ids),
+        ),
+    ).all()
+    if not positions:
+        return
+
+    index_of_game = {game_id: i for i, game_id in enumerate(game_ids)}
+    params = []
+    for position_id, game_id, half_move in positions:
+        flags = position_flags(result, index_of_game[game_id], half_move)
+        if flags is not None:
+            params.append({"id": position_id, **flags})
+    if params:
+        db.execute(update(GamePosition), params)
+
+
+def store_classification(
+    db: Session,
+    game_ids: Sequence[int],
+    result: BatchClassification,
+) -> None:
+    """
+    Écrire précision et classifications d'un lot dans la base
+
+    Les drapeaux de `GamePosition` sont indexés par `half_move` (le
+    demi-coup qui mène à la position).
+    """
+    db.execute(
+        update(ChessGame),
+        [
+            {
+                "id": game_id,
+                "accuracy_white": _nullable(result.accuracy_white[i]),
+                "accuracy_black": _nullable(result.accuracy_black[i]),
+                "blunders_count": int(result.blunders_count[i]),
+            }
+            for i, game_id in enumerate(game_ids)
+        ],
+    )
+    store_position_flags(db, game_ids, result)
+
+
+def classify_stored_games(db: Session, batch_size: int = 1000) -> int:
+    """
+    Classifier par lots toutes les parties dont les évaluations sont stockées
+
+    Returns:
+        int: Nombre de parties classifiées
+    """
+    classified = 0
+    last_id = 0
+
+    while True:
+        rows = db.execute(
+            select(ChessGame.id, ChessGame.evals_packed)
+            .where(ChessGame.evals_packed.is_not(None), ChessGame.id > last_id)
+            .order_by(ChessGame.id)
+            .limit(batch_size),
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        game_ids = [row.id for row in rows]
+        result = classify_batch(
+            [np.frombuffer(row.evals_packed, dtype="<i2") for row in rows],
+        )
+        store_classification(db, game_ids, result)
+        db.commit()
+        classified += len(rows)
+        logger.info("Classification : %d partie(s) traitée(s)", classified)
+
+    return classified
+
+
+if __name__ == "__main__":
+    from app.db.database import SessionLocal
+    from app.db.models.user import User  # noqa: F401 (relations de ChessGame)
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as session:
+        classify_stored_games(session)
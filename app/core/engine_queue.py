@@ -0,0 +1,341 @@
+"""
+File de jobs moteur : l'API publie, des workers séparés analysent
+
+Un job est identifié par sa clé de position (FEN normalisée + mode +
+limite) : les clients qui demandent la même analyse partagent le même job
+et reçoivent les mêmes résultats, diffusés en pub/sub. Le résultat final
+reste en cache quelques secondes pour les demandes suivantes.
+
+Backend Redis si `settings.redis_url` est défini (workers sur d'autres
+machines), sinon file en mémoire du processus (tests, développement).
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from app.config import settings
+from app.core.position import normalize_fen
+
+# Types de messages publiés par les workers
+INFO = "info"  # Analyse en cours (mode "stream")
+RESULT = "result"  # Résultat final
+ERROR = "error"  # Échec du job
+FINAL_TYPES = (RESULT, ERROR)
+
+JOBS_KEY = "engine:jobs"
+PENDING_PREFIX = "engine:pending:"
+RESULT_PREFIX = "engine:result:"
+CHANNEL_PREFIX = "engine:channel:"
+WORKERS_KEY = "engine:workers"  # Sorted set : id du worker -> expiration
+WORKER_INFO_KEY = "engine:workers:info"  # Hash : id du worker -> infos JSON
+
+
+class QueueFullError(Exception):
+    """File saturée : le client doit réessayer plus tard"""
+
+
+class NoWorkerError(Exception):
+    """Aucun worker moteur n'a donné signe de vie récemment"""
+
+
+class EngineJobError(Exception):
+    """Le worker a signalé l'échec du job"""
+
+
+@dataclass(frozen=True)
+class EngineJob:
+    fen: str
+    # "analyse" : résultat final, "stream" : infos au fil de l'eau
+    mode: str = "analyse"
+    time_limit: float | None = None
+    depth: int | None = None
+    submitted_at: float = field(default_factory=time.time, compare=False)
+
+    @property
+    def key(self) -> str:
+        """Clé de déduplication : même position, même mode, même limite"""
+        raw = f"{self.mode}|{normalize_fen(self.fen)}|{self.time_limit}|{self.depth}"
+        return hashlib.sha1(raw.encode()).hexdigest()  # noqa: S324
+
+    def is_stale(self) -> bool:
+        """Plus aucun client n'attend ce job"""
+        return time.time() - self.submitted_at > settings.engine_job_timeout
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def loads(cls, raw: str | bytes) -> "EngineJob":
+        return cls(**json.loads(raw))
+
+
+def _heartbeat_ttl() -> int:
+    # Un worker est considéré mort après trois battements manqués
+    return settings.engine_heartbeat_seconds * 3
+
+
+class LocalJobQueue:
+    """File en mémoire : l'API et le worker tournent dans la même boucle"""
+
+    name = "local"
+
+    def __init__(self, max_jobs: int) -> None:
+        self._jobs: asyncio.Queue[EngineJob] = asyncio.Queue(maxsize=max_jobs)
+        self._pending: dict[str, float] = {}  # Clé -> expiration
+        self._results: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._channels: defaultdict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._workers: dict[str, tuple[float, dict[str, Any]]] = {}
+
+    def _cached_result(self, key: str) -> dict[str, Any] | None:
+        cached = self._results.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        return None
+
+    async def submit(self, job: EngineJob) -> bool:
+        now = time.monotonic()
+        if self._cached_result(job.key) or self._pending.get(job.key, 0) > now:
+            return False
+        try:
+            self._jobs.put_nowait(job)
+        except asyncio.QueueFull:
+            msg = "Engine queue is full"
+            raise QueueFullError(msg) from None
+        self._pending[job.key] = now + settings.engine_job_timeout
+        return True
+
+    @asynccontextmanager
+    async def subscribe(self, key: str) -> AsyncIterator[AsyncIterator[dict]]:
+        inbox: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self._channels[key].add(inbox)
+        try:
+            yield self._messages(key, inbox)
+        finally:
+            self._channels[key].discard(inbox)
+            if not self._channels[key]:
+                del self._channels[key]
+
+    async def _messages(
+        self,
+        key: str,
+        inbox: asyncio.Queue[dict[str, Any]],
+    ) -> AsyncIterator[dict[str, Any]]:
+        cached = self._cached_result(key)
+        if cached:
+            yield cached
+            return
+        while True:
+            yield await inbox.get()
+
+    async def next_job(self, timeout: float) -> EngineJob | None:
+        try:
+            return await asyncio.wait_for(self._jobs.get(), timeout)
+        except TimeoutError:
+            return None
+
+    async def publish(self, job: EngineJob, message: dict[str, Any]) -> None:
+        if message["type"] in FINAL_TYPES:
+            now = time.monotonic()
+            self._results = {k: v for k, v in self._results.items() if v[0] > now}
+            if message["type"] == RESULT:
+                self._results[job.key] = (now + settings.engine_result_ttl, message)
+            self._pending.pop(job.key, None)
+        for inbox in self._channels.get(job.key, ()):
+            inbox.put_nowait(message)
+
+    async def heartbeat(self, worker_id: str, info: dict[str, Any]) -> None:
+        self._workers[worker_id] = (time.monotonic() + _heartbeat_ttl(), info)
+
+    async def workers(self) -> list[dict[str, Any]]:
+        now = time.monotonic()
+        return [info for expires, info in self._workers.values() if expires > now]
+
+    async def depth(self) -> int:
+        return self._jobs.qsize()
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisJobQueue:
+    """
+    File Redis partagée entre les API et les workers
+
+    Les jobs sont dans une liste (LPUSH / BRPOP), les résultats sont
+    publiés sur un canal par clé de job ; les battements de cœur des
+    workers sont dans un sorted set dont le score est leur expiration.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, max_jobs: int) -> None:
+        # Dépendance optionnelle : seulement nécessaire avec REDIS_URL
+        import redis.asyncio as redis  # noqa: PLC0415
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._max_jobs = max_jobs
+
+    async def submit(self, job: EngineJob) -> bool:
+        if await self._redis.exists(RESULT_PREFIX + job.key):
+            return False
+        # Le verrou expire seul si le worker meurt pendant le job. Pris avant
+        # le contrôle de capacité : rejoindre un job en cours reste possible
+        # quand la file est pleine (comme avec LocalJobQueue)
+        if not await self._redis.set(
+            PENDING_PREFIX + job.key,
+            "1",
+            nx=True,
+            ex=settings.engine_job_timeout,
+        ):
+            return False
+        # Contrôle approximatif entre plusieurs API, suffisant pour la contre-pression
+        if await self._redis.llen(JOBS_KEY) >= self._max_jobs:
+            await self._redis.delete(PENDING_PREFIX + job.key)
+            msg = "Engine queue is full"
+            raise QueueFullError(msg)
+        await self._redis.lpush(JOBS_KEY, job.dumps())
+        return True
+
+    @asynccontextmanager
+    async def subscribe(self, key: str) -> AsyncIterator[AsyncIterator[dict]]:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(CHANNEL_PREFIX + key)
+        try:
+            yield self._messages(key, pubsub)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    async def _messages(self, key: str, pubsub: Any) -> AsyncIterator[dict[str, Any]]:
+        # Abonné avant de relire le cache : un résultat publié entre les
+        # deux n'est pas perdu
+        cached = await self._redis.get(RESULT_PREFIX + key)
+        if cached:
+            yield json.loads(cached)
+            return
+        async for raw in pubsub.listen():
+            if raw["type"] == "message":
+                yield json.loads(raw["data"])
+
+    async def next_job(self, timeout: float) -> EngineJob | None:
+        popped = await self._redis.brpop([JOBS_KEY], timeout=max(1, int(timeout)))
+        return EngineJob.loads(popped[1]) if popped else None
+
+    async def publish(self, job: EngineJob, message: dict[str, Any]) -> None:
+        raw = json.dumps(message)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            if message["type"] == RESULT:
+                pipe.set(RESULT_PREFIX + job.key, raw, ex=settings.engine_result_ttl)
+            if message["type"] in FINAL_TYPES:
+                pipe.delete(PENDING_PREFIX + job.key)
+            pipe.publish(CHANNEL_PREFIX + job.key, raw)
+            await pipe.execute()
+
+    async def heartbeat(self, worker_id: str, info: dict[str, Any]) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(WORKERS_KEY, {worker_id: time.time() + _heartbeat_ttl()})
+            pipe.hset(WORKER_INFO_KEY, worker_id, json.dumps(info))
+            await pipe.execute()
+
+    async def workers(self) -> list[dict[str, Any]]:
+        now = time.time()
+        # Workers morts : retirés du sorted set et du hash des infos
+        expired = await self._redis.zrangebyscore(WORKERS_KEY, "-inf", now)
+        if expired:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.zremrangebyscore(WORKERS_KEY, "-inf", now)
+                pipe.hdel(WORKER_INFO_KEY, *expired)
+                await pipe.execute()
+
+        alive = await self._redis.zrangebyscore(WORKERS_KEY, f"({now}", "+inf")
+        if not alive:
+            return []
+        infos = await self._redis.hmget(WORKER_INFO_KEY, alive)
+        # Infos effacées par un nettoyage concurrent juste avant un nouveau
+        # battement : le worker est vivant, ses infos reviennent au suivant
+        return [
+            json.loads(raw) if raw else {"id": worker_id}
+            for worker_id, raw in zip(alive, infos, strict=True)
+        ]
+
+    async def depth(self) -> int:
+        return await self._redis.llen(JOBS_KEY)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+JobQueue = LocalJobQueue | RedisJobQueue
+
+_queue: JobQueue | None = None
+
+
+def get_queue() -> JobQueue:
+    """File du processus, créée au premier appel"""
+    global _queue  # noqa: PLW0603
+    if _queue is None:
+        if settings.redis_url:
+            _queue = RedisJobQueue(settings.redis_url, settings.engine_queue_max_jobs)
+        else:
+            _queue = LocalJobQueue(settings.engine_queue_max_jobs)
+    return _queue
+
+
+async def close_queue() -> None:
+    global _queue  # noqa: PLW0603
+    if _queue is not None:
+        await _queue.close()
+        _queue = None
+
+
+async def stream_job(
+    job: EngineJob,
+    queue: JobQueue | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Publier un job (ou rejoindre le même job déjà en cours) et suivre ses résultats
+
+    Yields:
+        dict: Infos intermédiaires puis résultat final
+
+    Raises:
+        NoWorkerError: Aucun worker vivant
+        QueueFullError: File saturée
+        EngineJobError: Échec signalé par le worker
+        TimeoutError: Pas de résultat dans `settings.engine_job_timeout`
+    """
+    queue = queue or get_queue()
+    if not await queue.workers():
+        msg = "No engine worker available"
+        raise NoWorkerError(msg)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.engine_job_timeout
+    # Abonnement avant la publication : aucun message perdu
+    async with queue.subscribe(job.key) as messages:
+        await queue.submit(job)
+        while True:
+            # Délai appliqué à l'attente seule, jamais pendant un yield
+            remaining = max(deadline - loop.time(), 0)
+            message = await asyncio.wait_for(anext(messages), remaining)
+            if message["type"] == ERROR:
+                raise EngineJobError(message["error"])
+            yield message["data"]
+            if message["type"] == RESULT:
+                return
+
+
+async def analyse(job: EngineJob, queue: JobQueue | None = None) -> dict[str, Any]:
+    """Résultat final d'un job (voir `stream_job`)"""
+    result: dict[str, Any] = {}
+    async with aclosing(stream_job(job, queue)) as messages:
+        async for result in messages:  # noqa: B007
+            pass
+    return result
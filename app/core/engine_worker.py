@@ -0,0 +1,190 @@
+"""
+Worker moteur : consomme la file de jobs et publie les résultats
+
+Plusieurs workers, sur plusieurs machines, peuvent partager la même file
+Redis. Un crash de Stockfish n'échoue que le job en cours : le moteur est
+relancé et le worker continue.
+
+Usage: python -m app.core.engine_worker [--threads 2] [--hash 128]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from contextlib import suppress
+from typing import Any
+
+import chess
+import chess.engine
+
+from app.config import settings
+from app.core.engine_queue import (
+    ERROR,
+    INFO,
+    RESULT,
+    EngineJob,
+    JobQueue,
+    get_queue,
+)
+
+logger = logging.getLogger(__name__)
+
+# Intervalle minimal entre deux infos publiées en mode "stream"
+STREAM_INTERVAL = 0.5
+
+
+def score_payload(info: chess.engine.InfoDict) -> dict[str, Any]:
+    """Infos intermédiaires, au format de /ws/analyze"""
+    return {
+        "depth": info.get("depth"),
+        "nodes": info.get("nodes"),
+        "nps": info.get("nps"),
+        "score_cp": info["score"].white().score(mate_score=10000),
+        "score_mate": info["score"].white().mate(),
+        "pv": [move.uci() for move in info.get("pv", [])],
+    }
+
+
+def analysis_payload(fen: str, info: chess.engine.InfoDict) -> dict[str, Any]:
+    """Résultat final, au format de /analyze"""
+    pv = info.get("pv") or []
+    return {
+        "fen": fen,
+        "best_move": pv[0].uci() if pv else None,
+        "evaluation_cp": info["score"].white().score(mate_score=10000),
+        "mate_in": info["score"].white().mate(),
+        "nodes": info.get("nodes"),
+        "nps": info.get("nps"),
+    }
+
+
+class EngineWorker:
+    def __init__(
+        self,
+        queue: JobQueue,
+        stockfish_path: str | None = None,
+        threads: int = 2,
+        hash_mb: int = 128,
+    ) -> None:
+        self.queue = queue
+        self.stockfish_path = stockfish_path or settings.stockfish_path
+        self.options = {"Threads": threads, "Hash": hash_mb}
+        self.id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.started_at = time.time()
+        self.jobs_done = 0
+        self.current_job: str | None = None
+        self._engine: chess.engine.UciProtocol | None = None
+
+    async def _open_engine(self) -> chess.engine.UciProtocol:
+        _, engine = await chess.engine.popen_uci(self.stockfish_path)
+        await engine.configure(self.options)
+        return engine
+
+    async def _close_engine(self) -> None:
+        if self._engine is not None:
+            with suppress(chess.engine.EngineError):
+                await self._engine.quit()
+            self._engine = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await self.queue.heartbeat(
+                self.id,
+                {
+                    "id": self.id,
+                    "started_at": self.started_at,
+                    "jobs_done": self.jobs_done,
+                    "current_job": self.current_job,
+                    "seen_at": time.time(),
+                },
+            )
+            await asyncio.sleep(settings.engine_heartbeat_seconds)
+
+    def _limit(self, job: EngineJob) -> chess.engine.Limit:
+        return chess.engine.Limit(time=job.time_limit, depth=job.depth)
+
+    async def _analyse(self, job: EngineJob) -> None:
+        board = chess.Board(job.fen)
+        info = await self._engine.analyse(board, self._limit(job))
+        await self.queue.publish(
+            job,
+            {"type": RESULT, "data": analysis_payload(job.fen, info)},
+        )
+
+    async def _stream(self, job: EngineJob) -> None:
+        board = chess.Board(job.fen)
+        last: dict[str, Any] | None = None
+        last_sent = 0.0
+        with await self._engine.analysis(board, self._limit(job)) as analysis:
+            async for info in analysis:
+                if "score" not in info:
+                    continue
+                last = score_payload(info)
+                if time.monotonic() - last_sent >= STREAM_INTERVAL:
+                    await self.queue.publish(job, {"type": INFO, "data": last})
+                    last_sent = time.monotonic()
+        if last is None:
+            msg = "No score reported"
+            raise chess.engine.EngineError(msg)
+        await self.queue.publish(job, {"type": RESULT, "data": last})
+
+    async def run_job(self, job: EngineJob) -> None:
+        self.current_job = job.key
+        try:
+            if self._engine is None:
+                self._engine = await self._open_engine()
+            run = self._stream(job) if job.mode == "stream" else self._analyse(job)
+            await asyncio.wait_for(run, settings.engine_job_timeout)
+            self.jobs_done += 1
+        except ValueError as e:
+            await self.queue.publish(job, {"type": ERROR, "error": str(e)})
+        except (chess.engine.EngineError, OSError, TimeoutError):
+            # Stockfish a planté ou ne répond plus : relancé au prochain job
+            logger.exception("Moteur en échec sur %s", job.fen)
+            await self._close_engine()
+            await self.queue.publish(job, {"type": ERROR, "error": "Engine failure"})
+        finally:
+            self.current_job = None
+
+    async def run(self) -> None:
+        """Boucle principale, jusqu'à annulation"""
+        heartbeat = asyncio.create_task(self._heartbeat())
+        logger.info("Worker moteur %s démarré (file %s)", self.id, self.queue.name)
+        try:
+            while True:
+                job = await self.queue.next_job(timeout=1)
+                if job is None:
+                    continue
+                if job.is_stale():
+                    # Le client a déjà abandonné : inutile de calculer
+                    await self.queue.publish(
+                        job,
+                        {"type": ERROR, "error": "Job expired"},
+                    )
+                    continue
+                await self.run_job(job)
+        finally:
+            heartbeat.cancel()
+            await self._close_engine()
+
+
+async def main(threads: int, hash_mb: int) -> None:
+    if not settings.redis_url:
+        msg = "REDIS_URL est requis pour un worker séparé"
+        raise RuntimeError(msg)
+    worker = EngineWorker(get_queue(), threads=threads, hash_mb=hash_mb)
+    await worker.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--hash", type=int, default=128, dest="hash_mb")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(args.threads, args.hash_mb))
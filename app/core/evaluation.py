@@ -0,0 +1,220 @@
+"""
+Normalisation des évaluations moteur
+
+Les évaluations par demi-coup sont stockées compactées dans
+`ChessGame.evals_packed` (int16 little-endian, 2 octets par position) et
+les champs consultés en requête sont extraits dans des colonnes indexées.
+
+Usage: python -m app.core.evaluation  (conversion des anciennes lignes JSON)
+"""
+
+import logging
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import numpy as np
+from pydantic import ValidationError
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.classification import (
+    classify_batch,
+    classify_game,
+    position_flags,
+    store_position_flags,
+)
+from app.db.models.chess import ChessGame
+from app.schemas.analysis import EngineEvaluation
+
+logger = logging.getLogger(__name__)
+
+# Limites des phases de jeu, en demi-coups
+OPENING_END_PLY = 20  # 10 premiers coups
+ENDGAME_START_PLY = 60  # À partir du 31e coup
+
+
+@dataclass
+class EvaluationSummary:
+    """Champs résumés de l'analyse, un par colonne de `ChessGame`"""
+
+    first_blunder_ply: int | None
+    last_blunder_ply: int | None
+    max_eval_swing: int | None
+    max_loss_white: int | None
+    max_loss_black: int | None
+    accuracy_white: float | None
+    accuracy_black: float | None
+    accuracy_opening: float | None
+    accuracy_middlegame: float | None
+    accuracy_endgame: float | None
+    blunders_count: int
+
+
+def pack_evals(evals: Sequence[int] | np.ndarray) -> bytes:
+    """Compacter des évaluations en int16 little-endian"""
+    return np.asarray(evals, dtype="<i2").tobytes()
+
+
+def unpack_evals(data: bytes) -> np.ndarray:
+    """Opération inverse de `pack_evals` (sans copie)"""
+    return np.frombuffer(data, dtype="<i2")
+
+
+def move_losses(evals: Sequence[int] | np.ndarray) -> np.ndarray:
+    """Perte en centipawns de chaque coup pour le joueur qui le joue"""
+    delta = np.diff(np.asarray(evals, dtype=np.int64))
+    white = np.arange(1, len(delta) + 1) % 2 == 1
+    return np.where(white, -delta, delta)
+
+
+def _max(values: np.ndarray) -> int | None:
+    return int(values.max()) if values.size else None
+
+
+def _mean(values: np.ndarray) -> float | None:
+    return round(float(values.mean()), 2) if values.size else None
+
+
+def summarize(evals: Sequence[int] | np.ndarray) -> EvaluationSummary:
+    """
+    Calculer les champs résumés d'une série d'évaluations
+
+    Args:
+        evals: Évaluations en centipawns (POV blancs), position initiale incluse
+
+    Returns:
+        EvaluationSummary: Valeurs des colonnes résumées
+    """
+    result = classify_game(evals)
+    losses = move_losses(evals)
+    plies = np.arange(1, len(losses) + 1)
+    white = plies % 2 == 1
+    blunders = plies[result.is_blunder]
+
+    return EvaluationSummary(
+        first_blunder_ply=int(blunders[0]) if blunders.size else None,
+        last_blunder_ply=int(blunders[-1]) if blunders.size else None,
+        max_eval_swing=_max(np.abs(losses)),
+        max_loss_white=_max(losses[white]),
+        max_loss_black=_max(losses[~white]),
+        accuracy_white=_mean(result.accuracy[white]),
+        accuracy_black=_mean(result.accuracy[~white]),
+        accuracy_opening=_mean(result.accuracy[plies <= OPENING_END_PLY]),
+        accuracy_middlegame=_mean(
+            result.accuracy[(plies > OPENING_END_PLY) & (plies < ENDGAME_START_PLY)],
+        ),
+        accuracy_endgame=_mean(result.accuracy[plies >= ENDGAME_START_PLY]),
+        blunders_count=int(blunders.size),
+    )
+
+
+def worst_move_ply(evals: Sequence[int] | np.ndarray, color: str) -> int | None:
+    """Demi-coup du pire coup d'une couleur"""
+    first = 0 if color == "white" else 1
+    losses = move_losses(evals)[first::2]
+    return int(losses.argmax()) * 2 + first + 1 if losses.size else None
+
+
+def evaluation_columns(evaluation: EngineEvaluation) -> dict[str, Any]:
+    """
+    Colonnes de `ChessGame` à écrire pour une évaluation
+
+    Le JSON ne conserve plus que les métadonnées du moteur : tout sauf les
+    évaluations, passées dans `evals_packed`.
+    """
+    metadata = evaluation.model_dump(exclude={"evals"}, exclude_none=True)
+    return {
+        "engine_evaluation": metadata or None,
+        "evals_packed": pack_evals(evaluation.evals),
+        "analyzed": True,
+        **asdict(summarize(evaluation.evals)),
+    }
+
+
+def store_evaluation(game: ChessGame, evaluation: EngineEvaluation) -> None:
+    """
+    Enregistrer l'évaluation d'une partie dans sa forme normalisée
+
+    Les positions déjà enregistrées de la partie reçoivent la
+    classification de leur coup.
+    """
+    for column, value in evaluation_columns(evaluation).items():
+        setattr(game, column, value)
+
+    result = classify_game(evaluation.evals)
+    for position in game.positions:
+        flags = position_flags(result, 0, position.half_move)
+        for column, value in (flags or {}).items():
+            setattr(position, column, value)
+
+
+def parse_engine_evaluation(raw: Any) -> EngineEvaluation | None:
+    """Lire un ancien `engine_evaluation` (objet ou liste brute d'évals)"""
+    if isinstance(raw, list):
+        raw = {"evals": raw}
+    try:
+        return EngineEvaluation.model_validate(raw)
+    except ValidationError:
+        return None
+
+
+def backfill_evaluations(db: Session, batch_size: int = 500) -> int:
+    """
+    Convertir par lots les lignes dont l'évaluation est encore en JSON
+
+    Les drapeaux des `GamePosition` sont écrits au passage. Les JSON
+    illisibles sont laissés en l'état et signalés.
+
+    Returns:
+        int: Nombre de parties converties
+    """
+    converted = 0
+    last_id = 0
+
+    while True:
+        rows = db.execute(
+            select(ChessGame.id, ChessGame.engine_evaluation)
+            .where(
+                ChessGame.evals_packed.is_(None),
+                ChessGame.engine_evaluation.is_not(None),
+                ChessGame.id > last_id,
+            )
+            .order_by(ChessGame.id)
+            .limit(batch_size),
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        params = []
+        series = []
+        for row in rows:
+            evaluation = parse_engine_evaluation(row.engine_evaluation)
+            if evaluation is None or not evaluation.evals:
+                logger.warning("Évaluation illisible pour la partie %d", row.id)
+                continue
+            params.append({"id": row.id, **evaluation_columns(evaluation)})
+            series.append(evaluation.evals)
+
+        if params:
+            db.execute(update(ChessGame), params)
+            store_position_flags(
+                db,
+                [p["id"] for p in params],
+                classify_batch(series),
+            )
+            db.commit()
+            converted += len(params)
+        logger.info("Backfill des évaluations : %d partie(s) convertie(s)", converted)
+
+    return converted
+
+
+if __name__ == "__main__":
+    from app.db.database import SessionLocal
+    from app.db.models.user import User  # noqa: F401 (relations de ChessGame)
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as session:
+        backfill_evaluations(session)
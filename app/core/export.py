@@ -0,0 +1,122 @@
+"""
+Export en flux des parties d'un utilisateur (PGN / NDJSON)
+
+Les lignes sont lues par paquets via un curseur côté serveur (`yield_per`)
+et envoyées au fur et à mesure : la mémoire reste constante quel que soit
+le nombre de parties.
+"""
+
+import json
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Select, or_, select
+from sqlalchemy.orm import Session, aliased
+
+from app.db.database import read_session
+from app.db.models.chess import ChessGame
+from app.db.models.user import User
+
+EXPORT_CHUNK_SIZE = 500
+
+
+@dataclass
+class ExportFilters:
+    """Filtres optionnels de l'export"""
+
+    time_class: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+    rated: bool | None = None
+
+    def apply(self, stmt: Select[Any]) -> Select[Any]:
+        if self.time_class is not None:
+            stmt = stmt.where(ChessGame.time_class == self.time_class)
+        if self.since is not None:
+            stmt = stmt.where(ChessGame.game_date >= self.since)
+        if self.until is not None:
+            stmt = stmt.where(ChessGame.game_date < self.until)
+        if self.rated is not None:
+            stmt = stmt.where(ChessGame.rated.is_(self.rated))
+        return stmt
+
+
+def _user_games(stmt: Select[Any], user_id: int, filters: ExportFilters) -> Select[Any]:
+    stmt = stmt.where(
+        or_(ChessGame.white_player_id == user_id, ChessGame.black_player_id == user_id),
+    )
+    return filters.apply(stmt).order_by(ChessGame.game_date, ChessGame.id)
+
+
+def _stream_partitions(
+    stmt: Select[Any],
+    session_factory: Callable[[], Session],
+    chunk_size: int,
+) -> Iterator[list[Any]]:
+    # La session est ouverte ici et non via Depends(get_db) : elle doit
+    # vivre aussi longtemps que la réponse en flux
+    with session_factory() as db:
+        result = db.execute(stmt.execution_options(yield_per=chunk_size))
+        yield from result.partitions()
+
+
+def iter_pgn(
+    user_id: int,
+    filters: ExportFilters,
+    session_factory: Callable[[], Session] = read_session,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Parties au format PGN, séparées par une ligne vide"""
+    stmt = _user_games(select(ChessGame.pgn), user_id, filters)
+    for rows in _stream_partitions(stmt, session_factory, chunk_size):
+        yield b"".join(row.pgn.strip().encode() + b"\n\n" for row in rows)
+
+
+def iter_ndjson(
+    user_id: int,
+    filters: ExportFilters,
+    session_factory: Callable[[], Session] = read_session,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Une partie JSON par ligne (métadonnées + PGN)"""
+    white = aliased(User)
+    black = aliased(User)
+    stmt = _user_games(
+        select(
+            ChessGame.id,
+            ChessGame.chess_com_game_id,
+            ChessGame.lichess_game_id,
+            ChessGame.game_date,
+            ChessGame.time_control,
+            ChessGame.time_class,
+            ChessGame.rated,
+            white.username.label("white"),
+            black.username.label("black"),
+            ChessGame.white_player_rating,
+            ChessGame.black_player_rating,
+            ChessGame.result,
+            ChessGame.termination,
+            ChessGame.winner,
+            ChessGame.pgn,
+        )
+        .join(white, white.id == ChessGame.white_player_id)
+        .join(black, black.id == ChessGame.black_player_id),
+        user_id,
+        filters,
+    )
+    for rows in _stream_partitions(stmt, session_factory, chunk_size):
+        yield b"".join(
+            json.dumps(row._asdict(), default=str).encode() + b"\n" for row in rows
+        )
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compresser un flux d'octets en gzip à la volée"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = en-tête gzip
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,262 @@
+"""
+Import par lots des parties, dédupliquées sur leur contenu
+
+Usage: python -m app.core.game_import  (empreintes des parties existantes)
+"""
+
+import hashlib
+import io
+import logging
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from itertools import islice
+from typing import Any
+
+import chess.pgn
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.rating_history import update_rating_history
+from app.db.models.chess import ChessGame
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+@dataclass
+class ImportResult:
+    """Bilan d'un import par lots"""
+
+    inserted_ids: list[int] = field(default_factory=list)
+    skipped: int = 0
+
+    @property
+    def inserted(self) -> int:
+        return len(self.inserted_ids)
+
+
+def normalize_moves(pgn: str) -> list[str]:
+    """
+    Extraire la suite de coups UCI de la ligne principale d'un PGN
+
+    Les en-têtes, commentaires, variantes et la notation SAN sont ignorés :
+    deux PGN reformatés d'une même partie donnent la même liste.
+
+    Args:
+        pgn: Texte PGN de la partie
+
+    Returns:
+        list[str]: Coups au format UCI (["e2e4", "e7e5", ...])
+    """
+    game = chess.pgn.read_game(io.StringIO(pgn))
+    if game is None:
+        return []
+    return [move.uci() for move in game.mainline_moves()]
+
+
+def compute_content_hash(
+    white: str | int,
+    black: str | int,
+    game_date: datetime,
+    moves: Sequence[str],
+) -> str:
+    """
+    Calculer l'empreinte du contenu d'une partie
+
+    Args:
+        white: Identifiant du joueur blanc
+        black: Identifiant du joueur noir
+        game_date: Date de la partie (naïve = UTC)
+        moves: Coups UCI normalisés
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale (64 caractères)
+    """
+    if game_date.tzinfo is None:
+        game_date = game_date.replace(tzinfo=UTC)
+    date_key = game_date.astimezone(UTC).replace(microsecond=0).isoformat()
+
+    payload = "\x1f".join(
+        [str(white).lower(), str(black).lower(), date_key, " ".join(moves)],
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def game_content_hash(row: dict[str, Any]) -> str:
+    """Empreinte d'une ligne `ChessGame` (dictionnaire de colonnes)"""
+    return compute_content_hash(
+        row["white_player_id"],
+        row["black_player_id"],
+        row["game_date"],
+        normalize_moves(row["pgn"]),
+    )
+
+
+def existing_hashes(db: Session, hashes: Iterable[str]) -> set[str]:
+    """
+    Retourner les empreintes déjà présentes en base, en une seule requête
+    """
+    hashes = list(hashes)
+    if not hashes:
+        return set()
+    stmt = select(ChessGame.content_hash).where(ChessGame.content_hash.in_(hashes))
+    return set(db.execute(stmt).scalars())
+
+
+def drop_known_games(
+    db: Session,
+    rows: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """
+    Écarter les parties dont l'identifiant Chess.com / Lichess est déjà connu
+
+    Une seule requête ensembliste, avant tout calcul d'empreinte : les
+    parties relues (recouvrement de synchronisation) ne sont pas reparsées.
+    """
+    chess_com_ids = {r["chess_com_game_id"] for r in rows if r.get("chess_com_game_id")}
+    lichess_ids = {r["lichess_game_id"] for r in rows if r.get("lichess_game_id")}
+    conditions = []
+    if chess_com_ids:
+        conditions.append(ChessGame.chess_com_game_id.in_(chess_com_ids))
+    if lichess_ids:
+        conditions.append(ChessGame.lichess_game_id.in_(lichess_ids))
+    if not conditions:
+        return rows
+
+    known = db.execute(
+        select(ChessGame.chess_com_game_id, ChessGame.lichess_game_id).where(
+            or_(*conditions),
+        ),
+    ).all()
+    known_chess_com = {row.chess_com_game_id for row in known} - {None}
+    known_lichess = {row.lichess_game_id for row in known} - {None}
+    return [
+        row
+        for row in rows
+        if row.get("chess_com_game_id") not in known_chess_com
+        and row.get("lichess_game_id") not in known_lichess
+    ]
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def import_games(
+    db: Session,
+    games: Iterable[dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ImportResult:
+    """
+    Importer des parties par lots en ignorant les doublons
+
+    Chaque lot est d'abord filtré sur les identifiants externes déjà connus,
+    puis dédupliqué en mémoire et contre la base (une requête ensembliste
+    sur `content_hash`), et inséré avec ON CONFLICT DO NOTHING
+    pour rester idempotent face aux imports concurrents ou aux identifiants
+    externes déjà connus. L'historique de classement des parties insérées
+    est mis à jour dans la même transaction.
+
+    Args:
+        db: Session de base de données
+        games: Dictionnaires de colonnes `ChessGame` (content_hash optionnel)
+        batch_size: Nombre de parties par lot
+
+    Returns:
+        ImportResult: Identifiants insérés et nombre de doublons ignorés
+    """
+    result = ImportResult()
+
+    for batch in _batched(games, batch_size):
+        by_hash: dict[str, dict[str, Any]] = {}
+        for row in drop_known_games(db, batch):
+            content_hash = row.get("content_hash") or game_content_hash(row)
+            by_hash.setdefault(content_hash, {**row, "content_hash": content_hash})
+
+        known = existing_hashes(db, by_hash)
+        new_rows = [row for h, row in by_hash.items() if h not in known]
+
+        if new_rows:
+            stmt = (
+                insert(ChessGame)
+                .on_conflict_do_nothing()
+                .returning(ChessGame.id, ChessGame.content_hash)
+            )
+            inserted = db.execute(stmt, new_rows).all()
+            update_rating_history(db, [by_hash[row.content_hash] for row in inserted])
+            db.commit()
+            result.inserted_ids.extend(row.id for row in inserted)
+        else:
+            inserted = []
+
+        result.skipped += len(batch) - len(inserted)
+
+    logger.info(
+        "Import terminé : %d insérée(s), %d doublon(s)",
+        result.inserted,
+        result.skipped,
+    )
+    return result
+
+
+def backfill_content_hashes(db: Session, batch_size: int = 1000) -> int:
+    """
+    Calculer `content_hash` pour les parties importées avant son ajout
+
+    Les parties dont l'empreinte existe déjà (doublons historiques) sont
+    laissées à NULL pour ne pas violer la contrainte d'unicité.
+
+    Returns:
+        int: Nombre de parties mises à jour
+    """
+    updated = 0
+    last_id = 0
+
+    while True:
+        rows = db.execute(
+            select(
+                ChessGame.id,
+                ChessGame.white_player_id,
+                ChessGame.black_player_id,
+                ChessGame.game_date,
+                ChessGame.pgn,
+            )
+            .where(ChessGame.content_hash.is_(None), ChessGame.id > last_id)
+            .order_by(ChessGame.id)
+            .limit(batch_size),
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        by_hash: dict[str, int] = {}
+        for row in rows:
+            by_hash.setdefault(game_content_hash(row._asdict()), row.id)
+        known = existing_hashes(db, by_hash)
+
+        params = [
+            {"id": game_id, "content_hash": h}
+            for h, game_id in by_hash.items()
+            if h not in known
+        ]
+        if params:
+            db.execute(update(ChessGame), params)
+            db.commit()
+            updated += len(params)
+
+    return updated
+
+
+if __name__ == "__main__":
+    from app.db.database import SessionLocal
+    from app.db.models.user import User  # noqa: F401 (relations de ChessGame)
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as session:
+        count = backfill_content_hashes(session)
+    logger.info("Empreintes calculées : %d partie(s)", count)
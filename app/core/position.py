@@ -0,0 +1,109 @@
+"""
+Validation de positions et coups légaux, sans moteur
+
+Les positions sont mémoïsées par FEN normalisée (LRU) : les frontends
+redemandent souvent les mêmes positions (début de partie, navigation dans
+une partie), qui ne sont alors ni re-parsées ni re-générées.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+import chess
+
+POSITION_CACHE_SIZE = 8192
+
+
+@dataclass(frozen=True)
+class PositionInfo:
+    fen: str
+    turn: str  # "white" / "black"
+    legal_moves: tuple[tuple[str, str], ...]  # (uci, san)
+    is_check: bool
+    is_checkmate: bool
+    is_stalemate: bool
+    is_game_over: bool
+    result: str | None  # "1-0", "0-1", "1/2-1/2" si la partie est finie
+
+
+@dataclass(frozen=True)
+class AppliedMove:
+    uci: str
+    san: str
+    position: PositionInfo
+
+
+def normalize_fen(fen: str) -> str:
+    """Clé de cache : espaces superflus retirés"""
+    return " ".join(fen.split())
+
+
+@lru_cache(maxsize=POSITION_CACHE_SIZE)
+def _board(fen: str) -> chess.Board:
+    board = chess.Board(fen)
+    if not board.is_valid():
+        msg = f"Illegal position: {board.status()!r}"
+        raise ValueError(msg)
+    return board
+
+
+@lru_cache(maxsize=POSITION_CACHE_SIZE)
+def _position_info(fen: str) -> PositionInfo:
+    # Copie : board.san() joue/déjoue les coups sur l'échiquier partagé
+    board = _board(fen).copy(stack=False)
+    outcome = board.outcome(claim_draw=False)
+    return PositionInfo(
+        fen=board.fen(),
+        turn="white" if board.turn == chess.WHITE else "black",
+        legal_moves=tuple((move.uci(), board.san(move)) for move in board.legal_moves),
+        is_check=board.is_check(),
+        is_checkmate=board.is_checkmate(),
+        is_stalemate=board.is_stalemate(),
+        is_game_over=outcome is not None,
+        result=outcome.result() if outcome else None,
+    )
+
+
+def get_position(fen: str) -> PositionInfo:
+    """
+    Valider une FEN et lister les coups légaux
+
+    Raises:
+        ValueError: FEN invalide ou position illégale
+    """
+    return _position_info(normalize_fen(fen))
+
+
+def apply_move(fen: str, move: str) -> AppliedMove:
+    """
+    Jouer un coup (UCI ou SAN) depuis une position
+
+    Raises:
+        ValueError: FEN invalide ou coup illégal
+    """
+    return _apply_move(normalize_fen(fen), move.strip())
+
+
+@lru_cache(maxsize=POSITION_CACHE_SIZE)
+def _apply_move(fen: str, move: str) -> AppliedMove:
+    board = _board(fen).copy(stack=False)
+    try:
+        parsed = chess.Move.from_uci(move)
+        if parsed not in board.legal_moves:
+            parsed = board.parse_san(move)
+    except ValueError:
+        parsed = board.parse_san(move)
+    # parse_san accepte le coup nul ("0000", "--") : ce n'est pas un coup joué
+    if not parsed:
+        msg = f"Illegal move: {move}"
+        raise ValueError(msg)
+
+    san = board.san(parsed)
+    board.push(parsed)
+    return AppliedMove(uci=parsed.uci(), san=san, position=_position_info(board.fen()))
+
+
+def cache_info() -> dict[str, int]:
+    """Statistiques du cache des positions"""
+    info = _position_info.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
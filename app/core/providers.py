@@ -0,0 +1,261 @@
+"""
+Clients HTTP des fournisseurs de parties (Chess.com, Lichess)
+
+Les clients sont interchangeables : l'URL de base est configurable pour
+pointer vers un faux serveur HTTP local pendant les tests.
+"""
+
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+from typing import Any
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderClient(ABC):
+    """
+    Base commune : pool de connexions et requêtes conditionnelles
+
+    Les validateurs (ETag / Last-Modified) de chaque URL sont conservés pour
+    la durée de vie du client ; une réponse 304 signifie qu'il n'y a rien de
+    nouveau à importer. Ceux lus pendant la synchronisation d'un compte
+    restent en attente jusqu'à `confirm_validators` : si l'import échoue,
+    les mêmes ressources sont relues en entier la fois suivante.
+    """
+
+    name: str
+    username_attr: str  # Colonne de `User` portant le pseudo du fournisseur
+    synced_at_attr: str  # Colonne de `User` portant le watermark du compte
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = settings.sync_max_concurrency,
+        timeout: float = 30.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self._validators: dict[str, dict[str, str]] = {}
+        # Compte -> validateurs lus pendant sa synchronisation en cours
+        self._pending: dict[str, dict[str, dict[str, str]]] = {}
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=timeout,
+            headers={"User-Agent": f"{settings.app_name}/{settings.app_version}"},
+            transport=transport,
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _conditional_headers(self, url: str) -> dict[str, str]:
+        validators = self._validators.get(url, {})
+        headers = {}
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last-modified" in validators:
+            headers["If-Modified-Since"] = validators["last-modified"]
+        return headers
+
+    def _remember_validators(
+        self,
+        account: str,
+        url: str,
+        response: httpx.Response,
+    ) -> None:
+        validators = {
+            key: response.headers[key]
+            for key in ("etag", "last-modified")
+            if key in response.headers
+        }
+        if validators:
+            self._pending.setdefault(account.lower(), {})[url] = validators
+
+    def confirm_validators(self, account: str) -> None:
+        """Conserver les validateurs d'une synchronisation menée à bien"""
+        self._validators.update(self._pending.pop(account.lower(), {}))
+
+    def discard_validators(self, account: str) -> None:
+        """Oublier les validateurs d'une synchronisation qui a échoué"""
+        self._pending.pop(account.lower(), None)
+
+    async def _get_json(self, account: str, url: str) -> Any | None:
+        """GET conditionnel ; retourne None si la ressource n'a pas changé"""
+        response = await self._client.get(url, headers=self._conditional_headers(url))
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            return None
+        response.raise_for_status()
+        self._remember_validators(account, url, response)
+        return response.json()
+
+    @abstractmethod
+    def iter_games(
+        self,
+        username: str,
+        since: datetime | None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Parcourir les parties terminées depuis `since`
+
+        Chaque élément est un dictionnaire de colonnes `ChessGame`, sans
+        les identifiants de joueurs mais avec `white_username` et
+        `black_username` à résoudre par l'appelant.
+        """
+
+
+class ChessComClient(ProviderClient):
+    name = "chess_com"
+    username_attr = "chess_com_username"
+    synced_at_attr = "chess_com_synced_at"
+
+    def __init__(self, base_url: str = settings.chess_com_api_url, **kwargs: Any):
+        super().__init__(base_url, **kwargs)
+        self._archives: dict[str, Any] = {}
+
+    async def iter_games(
+        self,
+        username: str,
+        since: datetime | None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        # La liste des archives n'a pas changé (304) : on réutilise la
+        # précédente, le mois en cours peut quand même contenir du nouveau
+        username = username.lower()
+        archives = await self._get_json(
+            username,
+            f"{self.base_url}/player/{username}/games/archives",
+        )
+        if archives is None:
+            archives = self._archives.get(username, {})
+        self._archives[username] = archives
+
+        since_month = (since.year, since.month) if since else None
+        for archive_url in archives.get("archives", []):
+            # Les archives sont mensuelles : ".../games/2024/05"
+            year, month = (int(part) for part in archive_url.rsplit("/", 2)[-2:])
+            if since_month and (year, month) < since_month:
+                continue
+
+            archive = await self._get_json(username, archive_url)
+            if archive is None:
+                continue
+            for game in archive.get("games", []):
+                row = self._to_row(game)
+                if row and (since is None or row["game_date"] >= since):
+                    yield row
+
+    @staticmethod
+    def _to_row(game: dict[str, Any]) -> dict[str, Any] | None:
+        if not game.get("pgn"):
+            return None
+
+        white, black = game["white"], game["black"]
+        if white.get("result") == "win":
+            winner, termination = "white", black.get("result")
+        elif black.get("result") == "win":
+            winner, termination = "black", white.get("result")
+        else:
+            winner, termination = None, white.get("result")
+
+        url = game["url"]
+        return {
+            "chess_com_game_id": url.rstrip("/").rsplit("/", 1)[-1],
+            "chess_com_url": url,
+            "game_date": datetime.fromtimestamp(game["end_time"], UTC),
+            "time_control": game.get("time_control"),
+            "time_class": game.get("time_class"),
+            "rules": game.get("rules", "chess"),
+            "rated": game.get("rated", True),
+            "white_player_rating": white.get("rating"),
+            "black_player_rating": black.get("rating"),
+            "result": {"white": "1-0", "black": "0-1"}.get(winner, "1/2-1/2"),
+            "termination": termination,
+            "winner": winner,
+            "pgn": game["pgn"],
+            "fen_final": game.get("fen"),
+            "white_username": white["username"],
+            "black_username": black["username"],
+        }
+
+
+class LichessClient(ProviderClient):
+    name = "lichess"
+    username_attr = "lichess_username"
+    synced_at_attr = "lichess_synced_at"
+
+    def __init__(self, base_url: str = settings.lichess_api_url, **kwargs: Any):
+        super().__init__(base_url, **kwargs)
+
+    async def iter_games(
+        self,
+        username: str,
+        since: datetime | None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        params: dict[str, Any] = {"pgnInJson": "true", "sort": "dateAsc"}
+        if since:
+            params["since"] = int(since.timestamp() * 1000)
+
+        # L'export Lichess est un flux NDJSON : on importe au fil de l'eau
+        async with self._client.stream(
+            "GET",
+            f"{self.base_url}/api/games/user/{username}",
+            params=params,
+            headers={"Accept": "application/x-ndjson"},
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                row = self._to_row(json.loads(line))
+                if row:
+                    yield row
+
+    def _to_row(self, game: dict[str, Any]) -> dict[str, Any] | None:
+        players = game.get("players", {})
+        white = players.get("white", {})
+        black = players.get("black", {})
+        # Parties contre l'IA ou anonymes : pas de compte à rattacher
+        if "user" not in white or "user" not in black or not game.get("pgn"):
+            return None
+
+        winner = game.get("winner")
+        clock = game.get("clock")
+        return {
+            "lichess_game_id": game["id"],
+            "lichess_url": f"{self.base_url}/{game['id']}",
+            "game_date": datetime.fromtimestamp(
+                game.get("lastMoveAt", game["createdAt"]) / 1000,
+                UTC,
+            ),
+            "time_control": (
+                f"{clock['initial']}+{clock['increment']}" if clock else None
+            ),
+            "time_class": game.get("speed"),
+            "rules": (
+                "chess" if game.get("variant") == "standard" else game.get("variant")
+            ),
+            "rated": game.get("rated", True),
+            "white_player_rating": white.get("rating"),
+            "black_player_rating": black.get("rating"),
+            "result": {"white": "1-0", "black": "0-1"}.get(winner, "1/2-1/2"),
+            "termination": game.get("status"),
+            "winner": winner,
+            "pgn": game["pgn"],
+            "white_username": white["user"]["name"],
+            "black_username": black["user"]["name"],
+        }
+
+
+def default_clients() -> dict[str, ProviderClient]:
+    """Clients configurés sur les API publiques (cf. settings)"""
+    clients: list[ProviderClient] = [ChessComClient(), LichessClient()]
+    return {client.name: client for client in clients}
@@ -0,0 +1,407 @@
+"""
+Extraction de puzzles à partir des parties analysées
+
+Chaque gaffe d'un joueur donne une position candidate (avant le coup
+joué). Une recherche moteur courte, répartie sur un pool de processus,
+vérifie que la solution est unique à chaque coup du joueur.
+
+Usage: python -m app.core.puzzles
+"""
+
+import contextlib
+import io
+import logging
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.util import Finalize
+from typing import Any
+
+import chess
+import chess.engine
+import chess.pgn
+import numpy as np
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.classification import classify_batch, win_percent
+from app.core.evaluation import unpack_evals
+from app.db.models.chess import ChessGame, GamePosition
+from app.db.models.puzzle import Puzzle
+from app.db.models.user import User
+
+logger = logging.getLogger(__name__)
+
+MAX_PUZZLES_PER_GAME = 2
+MAX_SOLUTION_MOVES = 3  # Coups du joueur dans la solution
+VERIFY_LIMIT = chess.engine.Limit(depth=16)
+# Écart minimal de chances de gain entre le meilleur et le 2e coup
+UNIQUE_GAP = 25.0
+# Chances de gain minimales après la solution (sinon ce n'est pas une tactique)
+MIN_WIN_PERCENT = 70.0
+DEFAULT_RATING = 1500
+
+_engine: chess.engine.SimpleEngine | None = None
+_stockfish_path: str | None = None
+
+
+class EngineUnavailableError(Exception):
+    """Le moteur ne démarre pas (chemin invalide, binaire absent)"""
+
+
+class VerificationError(Exception):
+    """Le moteur a échoué sur une position : à revérifier plus tard"""
+
+
+@dataclass
+class Candidate:
+    game_id: int
+    user_id: int
+    ply: int  # Demi-coup manqué : la position est celle d'avant
+    fen: str
+    user_rating: int | None
+
+
+def _open_engine() -> None:
+    global _engine  # noqa: PLW0603
+    try:
+        _engine = chess.engine.SimpleEngine.popen_uci(_stockfish_path)
+        _engine.configure({"Threads": 1, "Hash": 32})
+    except (chess.engine.EngineError, OSError) as e:
+        # Pas d'exception dans l'initializer : elle casserait tout le pool
+        logger.error("Moteur indisponible (%s) : %s", _stockfish_path, e)
+        _close_engine()
+
+
+def _close_engine() -> None:
+    global _engine  # noqa: PLW0603
+    if _engine is not None:
+        with contextlib.suppress(chess.engine.EngineError, OSError):
+            _engine.quit()
+        _engine = None
+
+
+def _init_worker(stockfish_path: str) -> None:
+    """Ouvrir un moteur par processus du pool"""
+    global _stockfish_path  # noqa: PLW0603
+    _stockfish_path = stockfish_path
+    _open_engine()
+    # atexit ne tourne pas dans les processus du pool, et le thread du
+    # moteur empêcherait le worker de s'arrêter
+    Finalize(None, _close_engine, exitpriority=10)
+
+
+def _solver_win_percent(score: chess.engine.PovScore, solver: chess.Color) -> float:
+    cp = score.pov(solver).score(mate_score=10000)
+    return float(win_percent(np.float64(cp)))
+
+
+def verify_candidate(fen: str) -> dict[str, Any] | None:
+    """
+    Chercher une solution unique depuis une position (dans un worker)
+
+    Returns:
+        dict | None: {"solution", "theme", "length"} ou None si la position
+        n'a pas de solution unique et gagnante
+
+    Raises:
+        VerificationError: Le moteur a planté sur cette position (il est
+            relancé pour les suivantes)
+        EngineUnavailableError: Le moteur ne peut pas être lancé
+    """
+    if _stockfish_path is None:
+        msg = "verify_candidate doit tourner dans le pool de processus"
+        raise RuntimeError(msg)
+    if _engine is None:
+        _open_engine()
+        if _engine is None:
+            msg = f"Moteur indisponible : {_stockfish_path}"
+            raise EngineUnavailableError(msg)
+    try:
+        return _solve(_engine, fen)
+    except (chess.engine.EngineError, OSError, TimeoutError) as e:
+        _close_engine()
+        _open_engine()
+        msg = f"Moteur en échec sur {fen} : {e}"
+        raise VerificationError(msg) from None
+    except ValueError as e:
+        # FEN invalide : la revérifier ne changerait rien
+        logger.warning("Position ignorée %s : %s", fen, e)
+        return None
+
+
+def _solve(engine: chess.engine.SimpleEngine, fen: str) -> dict[str, Any] | None:
+    board = chess.Board(fen)
+    solver = board.turn
+    solution: list[str] = []
+    first_score = None
+
+    while len(solution) < MAX_SOLUTION_MOVES * 2 and not board.is_game_over():
+        infos = engine.analyse(board, VERIFY_LIMIT, multipv=2)
+        # Recherche interrompue (mat, nulle, arrêt du moteur) : pas de variante
+        best = infos[0] if infos else {}
+        pv = best.get("pv")
+        if not pv or "score" not in best:
+            break
+        if board.turn == solver:
+            best_win = _solver_win_percent(best["score"], solver)
+            if len(infos) > 1 and "score" in infos[1]:
+                second_win = _solver_win_percent(infos[1]["score"], solver)
+                if best_win - second_win < UNIQUE_GAP:
+                    break
+            if first_score is None:
+                if best_win < MIN_WIN_PERCENT:
+                    return None
+                first_score = best["score"].pov(solver)
+        solution.append(pv[0].uci())
+        board.push(pv[0])
+
+    # La solution se termine sur un coup du joueur
+    if len(solution) % 2 == 0:
+        solution = solution[:-1]
+    if not solution or first_score is None:
+        return None
+
+    mate = first_score.mate()
+    if mate is not None and 0 < mate <= 5:
+        theme = f"mateIn{mate}"
+    elif first_score.score(mate_score=10000) >= 500:
+        theme = "crushing"
+    else:
+        theme = "advantage"
+    return {"solution": " ".join(solution), "theme": theme, "length": len(solution)}
+
+
+def _replay_fens(pgn: str, plies: set[int]) -> dict[int, str]:
+    """FEN des positions après `plies` demi-coups, en rejouant le PGN"""
+    game = chess.pgn.read_game(io.StringIO(pgn))
+    if game is None:
+        return {}
+    fens = {}
+    board = game.board()
+    if 0 in plies:
+        fens[0] = board.fen()
+    for ply, move in enumerate(game.mainline_moves(), start=1):
+        board.push(move)
+        if ply in plies:
+            fens[ply] = board.fen()
+    return fens
+
+
+def _fens_at(
+    db: Session,
+    games: list[Any],
+    plies: dict[int, set[int]],
+) -> dict[tuple[int, int], str]:
+    """
+    FEN des positions demandées d'un lot de parties
+
+    Une seule requête sur `GamePosition` pour tout le lot ; les positions
+    absentes sont retrouvées en rejouant le PGN.
+
+    Args:
+        games: Parties du lot (id, pgn)
+        plies: id de partie -> demi-coups voulus
+
+    Returns:
+        dict: (id de partie, demi-coup) -> FEN
+    """
+    pairs = [(game_id, ply) for game_id, wanted in plies.items() for ply in wanted]
+    if not pairs:
+        return {}
+    rows = db.execute(
+        select(GamePosition.game_id, GamePosition.half_move, GamePosition.fen).where(
+            tuple_(GamePosition.game_id, GamePosition.half_move).in_(pairs),
+        ),
+    ).all()
+    fens = {(row.game_id, row.half_move): row.fen for row in rows}
+
+    for game in games:
+        missing = {ply for ply in plies.get(game.id, ()) if (game.id, ply) not in fens}
+        if missing:
+            for ply, fen in _replay_fens(game.pgn, missing).items():
+                fens[game.id, ply] = fen
+    return fens
+
+
+def find_candidates(
+    db: Session,
+    games: list[Any],
+    active_users: set[int],
+) -> list[Candidate]:
+    """Positions candidates d'un lot de parties : les pires gaffes des joueurs"""
+    result = classify_batch([unpack_evals(game.evals_packed) for game in games])
+
+    picked: dict[int, list[tuple[int, int]]] = {}
+    for i, game in enumerate(games):
+        start, end = result.move_offsets[i], result.move_offsets[i + 1]
+        losses = result.win_loss[start:end]
+        blunder_plies = np.flatnonzero(result.is_blunder[start:end]) + 1
+        worst = blunder_plies[np.argsort(-losses[blunder_plies - 1])]
+
+        for ply in worst.tolist():
+            user_id = game.white_player_id if ply % 2 else game.black_player_id
+            if user_id in active_users:
+                picked.setdefault(game.id, []).append((ply, user_id))
+            if len(picked.get(game.id, ())) == MAX_PUZZLES_PER_GAME:
+                break
+
+    fens = _fens_at(
+        db,
+        games,
+        {game_id: {ply - 1 for ply, _ in plies} for game_id, plies in picked.items()},
+    )
+
+    candidates = []
+    for game in games:
+        for ply, user_id in picked.get(game.id, ()):
+            fen = fens.get((game.id, ply - 1))
+            if fen is not None:
+                rating = (
+                    game.white_player_rating if ply % 2 else game.black_player_rating
+                )
+                candidates.append(Candidate(game.id, user_id, ply, fen, rating))
+    return candidates
+
+
+def _verify_all(
+    pool: ProcessPoolExecutor,
+    candidates: list[Candidate],
+) -> tuple[list[dict[str, Any] | None], set[int]]:
+    """
+    Vérifier les candidats dans le pool
+
+    Returns:
+        tuple: Résultat par candidat, et ids des parties dont un candidat
+        n'a pas pu être vérifié
+
+    Raises:
+        EngineUnavailableError: Moteur indisponible, le lot est abandonné
+    """
+    futures = [pool.submit(verify_candidate, c.fen) for c in candidates]
+    verified: list[dict[str, Any] | None] = []
+    failed_games: set[int] = set()
+    try:
+        for candidate, future in zip(candidates, futures, strict=True):
+            try:
+                verified.append(future.result())
+            except VerificationError as e:
+                logger.warning("Partie %d à revérifier : %s", candidate.game_id, e)
+                verified.append(None)
+                failed_games.add(candidate.game_id)
+    finally:
+        for future in futures:
+            future.cancel()
+    return verified, failed_games
+
+
+def _puzzle_rows(
+    candidates: list[Candidate],
+    verified: Iterable[dict[str, Any] | None],
+) -> list[dict[str, Any]]:
+    rows = []
+    for candidate, found in zip(candidates, verified, strict=True):
+        if found is None:
+            continue
+        # Plus la solution est longue, plus le puzzle est difficile
+        base = candidate.user_rating or DEFAULT_RATING
+        rows.append(
+            {
+                "user_id": candidate.user_id,
+                "game_id": candidate.game_id,
+                "ply": candidate.ply,
+                "fen": candidate.fen,
+                "solution": found["solution"],
+                "theme": found["theme"],
+                "rating": base + 150 * (found["length"] // 2),
+            },
+        )
+    return rows
+
+
+def extract_puzzles(
+    db: Session,
+    batch_size: int = 200,
+    max_workers: int | None = None,
+) -> int:
+    """
+    Extraire les puzzles de toutes les parties analysées non traitées
+
+    Une partie n'est marquée traitée que si tous ses candidats ont été
+    vérifiés ; celles où le moteur a planté seront reprises au prochain
+    passage.
+
+    Returns:
+        int: Nombre de puzzles créés
+
+    Raises:
+        EngineUnavailableError: Moteur indisponible (rien n'est marqué)
+    """
+    created = 0
+    last_id = 0
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(settings.stockfish_path,),
+    ) as pool:
+        while True:
+            games = db.execute(
+                select(
+                    ChessGame.id,
+                    ChessGame.white_player_id,
+                    ChessGame.black_player_id,
+                    ChessGame.white_player_rating,
+                    ChessGame.black_player_rating,
+                    ChessGame.evals_packed,
+                    ChessGame.pgn,
+                )
+                .where(
+                    ChessGame.evals_packed.is_not(None),
+                    ChessGame.puzzles_extracted.is_not(True),
+                    ChessGame.id > last_id,
+                )
+                .order_by(ChessGame.id)
+                .limit(batch_size),
+            ).all()
+            if not games:
+                break
+            last_id = games[-1].id
+
+            players = {g.white_player_id for g in games} | {
+                g.black_player_id for g in games
+            }
+            active_users = set(
+                db.execute(
+                    select(User.id).where(User.id.in_(players), User.is_active),
+                ).scalars(),
+            )
+
+            candidates = find_candidates(db, games, active_users)
+            verified, failed_games = _verify_all(pool, candidates)
+            rows = _puzzle_rows(candidates, verified)
+            if rows:
+                db.execute(insert(Puzzle).on_conflict_do_nothing(), rows)
+            done = [g.id for g in games if g.id not in failed_games]
+            if done:
+                db.execute(
+                    update(ChessGame)
+                    .where(ChessGame.id.in_(done))
+                    .values(puzzles_extracted=True),
+                )
+            db.commit()
+
+            created += len(rows)
+            logger.info("Puzzles : %d créé(s) jusqu'à la partie %d", created, last_id)
+
+    return created
+
+
+if __name__ == "__main__":
+    from app.db.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as session:
+        extract_puzzles(session)
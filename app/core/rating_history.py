@@ -0,0 +1,258 @@
+"""
+Historique de classement pré-agrégé par période
+
+Chaque partie importée met à jour, pour chacun de ses joueurs actifs, une
+ligne par période (jour, semaine, mois) : dernier classement, min, max et
+nombre de parties. Un graphique sur plusieurs années lit quelques centaines
+de lignes au lieu de toutes les parties.
+
+Usage: python -m app.core.rating_history  (reconstruction complète)
+"""
+
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from operator import itemgetter
+from typing import Any
+
+from sqlalchemy import Date, case, cast, delete, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg, insert
+from sqlalchemy.orm import Session
+
+from app.db.models.chess import ChessGame
+from app.db.models.rating import RatingBucket
+from app.db.models.user import User
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = ("day", "week", "month")
+UNKNOWN_TIME_CLASS = "unknown"
+BUCKET_CONSTRAINT = "uq_rating_buckets_user_class_bucket_start"
+# Colonnes de la contrainte, dans son ordre
+BUCKET_KEY = ("user_id", "time_class", "bucket", "bucket_start")
+BUCKET_VALUES = (
+    "last_rating",
+    "last_game_date",
+    "min_rating",
+    "max_rating",
+    "games_count",
+)
+
+
+def bucket_start(bucket: str, game_date: datetime) -> date:
+    """Premier jour (UTC) de la période contenant `game_date`"""
+    if game_date.tzinfo is not None:
+        game_date = game_date.astimezone(UTC)
+    day = game_date.date()
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())  # Lundi, comme date_trunc
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+@dataclass
+class _Aggregate:
+    last_rating: int
+    last_game_date: datetime
+    min_rating: int
+    max_rating: int
+    games_count: int = 1
+
+    def add(self, rating: int, game_date: datetime) -> None:
+        if game_date >= self.last_game_date:
+            self.last_rating = rating
+            self.last_game_date = game_date
+        self.min_rating = min(self.min_rating, rating)
+        self.max_rating = max(self.max_rating, rating)
+        self.games_count += 1
+
+
+def aggregate_ratings(
+    games: Iterable[dict[str, Any]],
+    user_ids: set[int] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Agréger les classements d'un lot de parties par joueur et par période
+
+    Args:
+        games: Dictionnaires de colonnes `ChessGame`
+        user_ids: Joueurs à retenir (tous si None)
+
+    Returns:
+        list[dict]: Lignes `RatingBucket`, une par clé d'upsert
+    """
+    aggregates: dict[tuple[int, str, str, date], _Aggregate] = {}
+    for game in games:
+        if game.get("rated") is False:
+            continue
+        game_date = game["game_date"]
+        if game_date.tzinfo is None:
+            game_date = game_date.replace(tzinfo=UTC)
+        time_class = game.get("time_class") or UNKNOWN_TIME_CLASS
+        players = (
+            (game["white_player_id"], game.get("white_player_rating")),
+            (game["black_player_id"], game.get("black_player_rating")),
+        )
+        for user_id, rating in players:
+            if rating is None or (user_ids is not None and user_id not in user_ids):
+                continue
+            for bucket in BUCKETS:
+                key = (user_id, time_class, bucket, bucket_start(bucket, game_date))
+                if key in aggregates:
+                    aggregates[key].add(rating, game_date)
+                else:
+                    aggregates[key] = _Aggregate(rating, game_date, rating, rating)
+
+    return [
+        {
+            "user_id": user_id,
+            "time_class": time_class,
+            "bucket": bucket,
+            "bucket_start": start,
+            "last_rating": agg.last_rating,
+            "last_game_date": agg.last_game_date,
+            "min_rating": agg.min_rating,
+            "max_rating": agg.max_rating,
+            "games_count": agg.games_count,
+        }
+        for (user_id, time_class, bucket, start), agg in aggregates.items()
+    ]
+
+
+def upsert_rating_buckets(db: Session, rows: list[dict[str, Any]]) -> None:
+    """Fusionner des agrégats dans `rating_buckets` (sans commit)"""
+    if not rows:
+        return
+    # Même ordre de verrouillage pour tous les imports concurrents : deux
+    # transactions qui touchent les mêmes buckets ne s'interbloquent pas
+    rows = sorted(rows, key=itemgetter(*BUCKET_KEY))
+    stmt = insert(RatingBucket)
+    new = stmt.excluded
+    is_later = new.last_game_date >= RatingBucket.last_game_date
+    stmt = stmt.on_conflict_do_update(
+        constraint=BUCKET_CONSTRAINT,
+        set_={
+            "last_rating": case(
+                (is_later, new.last_rating),
+                else_=RatingBucket.last_rating,
+            ),
+            "last_game_date": func.greatest(
+                RatingBucket.last_game_date, new.last_game_date
+            ),
+            "min_rating": func.least(RatingBucket.min_rating, new.min_rating),
+            "max_rating": func.greatest(RatingBucket.max_rating, new.max_rating),
+            "games_count": RatingBucket.games_count + new.games_count,
+        },
+    )
+    db.execute(stmt, rows)
+
+
+def update_rating_history(db: Session, games: list[dict[str, Any]]) -> int:
+    """
+    Mettre à jour l'historique avec des parties nouvellement importées
+
+    Seuls les joueurs actifs sont agrégés : les comptes fantômes des
+    adversaires n'ont pas d'historique à afficher. Pas de commit, pour
+    rester dans la transaction de l'import.
+
+    Returns:
+        int: Nombre de lignes `RatingBucket` fusionnées
+    """
+    players = {g["white_player_id"] for g in games} | {
+        g["black_player_id"] for g in games
+    }
+    if not players:
+        return 0
+    active_users = set(
+        db.execute(
+            select(User.id).where(User.id.in_(players), User.is_active),
+        ).scalars(),
+    )
+    rows = aggregate_ratings(games, active_users)
+    upsert_rating_buckets(db, rows)
+    return len(rows)
+
+
+def rebuild_rating_history(db: Session, user_id: int | None = None) -> int:
+    """
+    Recalculer l'historique depuis `chess_games`, en SQL
+
+    Un import concurrent peut recréer un bucket entre la suppression et
+    l'insertion : le recalcul, qui relit toutes les parties, l'écrase.
+
+    Returns:
+        int: Nombre de lignes `RatingBucket` créées
+    """
+    sides = union_all(
+        *(
+            select(
+                player_id.label("user_id"),
+                rating.label("rating"),
+                ChessGame.game_date,
+                func.coalesce(ChessGame.time_class, UNKNOWN_TIME_CLASS).label(
+                    "time_class"
+                ),
+            ).where(rating.is_not(None), ChessGame.rated.is_not(False))
+            for player_id, rating in (
+                (ChessGame.white_player_id, ChessGame.white_player_rating),
+                (ChessGame.black_player_id, ChessGame.black_player_rating),
+            )
+        ),
+    ).subquery()
+
+    delete_stmt = delete(RatingBucket)
+    if user_id is not None:
+        delete_stmt = delete_stmt.where(RatingBucket.user_id == user_id)
+    db.execute(delete_stmt)
+
+    created = 0
+    for bucket in BUCKETS:
+        # Même découpage que bucket_start : date_trunc en UTC (semaine = lundi)
+        start = cast(
+            func.date_trunc(bucket, func.timezone("UTC", sides.c.game_date)),
+            Date,
+        )
+        query = (
+            select(
+                sides.c.user_id,
+                sides.c.time_class,
+                literal(bucket),
+                start,
+                array_agg(
+                    aggregate_order_by(sides.c.rating, sides.c.game_date.desc()),
+                )[1],
+                func.max(sides.c.game_date),
+                func.min(sides.c.rating),
+                func.max(sides.c.rating),
+                func.count(),
+            )
+            .join(User, User.id == sides.c.user_id)
+            .where(User.is_active)
+            .group_by(sides.c.user_id, sides.c.time_class, start)
+            # Ordre de verrouillage d'upsert_rating_buckets
+            .order_by(sides.c.user_id, sides.c.time_class, start)
+        )
+        if user_id is not None:
+            query = query.where(sides.c.user_id == user_id)
+
+        stmt = insert(RatingBucket).from_select([*BUCKET_KEY, *BUCKET_VALUES], query)
+        stmt = stmt.on_conflict_do_update(
+            constraint=BUCKET_CONSTRAINT,
+            set_={column: stmt.excluded[column] for column in BUCKET_VALUES},
+        )
+        result = db.execute(stmt)
+        created += result.rowcount
+    db.commit()
+
+    logger.info("Historique de classement : %d période(s) recalculée(s)", created)
+    return created
+
+
+if __name__ == "__main__":
+    from app.db.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as session:
+        rebuild_rating_history(session)
@@ -110,6 +110,20 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     )
 
 
+def token_subject(token: str) -> str | None:
+    """Sujet d'un jeton valide, sans accès à la base (None si invalide)"""
+    try:
+        payload = jwt.decode(
+            token,
+            settings.secret_key,
+            algorithms=[settings.algorithm],
+        )
+    except InvalidTokenError:
+        return None
+    subject = payload.get("sub")
+    return subject if isinstance(subject, str) else None
+
+
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: db_dependency,
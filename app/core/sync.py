@@ -0,0 +1,378 @@
+"""
+Synchronisation incrémentale des comptes Chess.com / Lichess liés
+
+Usage: python -m app.core.sync [--once]
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.game_import import (
+    DEFAULT_BATCH_SIZE,
+    ImportResult,
+    existing_hashes,
+    game_content_hash,
+    import_games,
+)
+from app.core.providers import ProviderClient, default_clients
+from app.core.rating_history import rebuild_rating_history
+from app.db.database import SessionLocal
+from app.db.models.chess import ChessGame
+from app.db.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Marge de recouvrement sous le watermark : les doublons sont ignorés à
+# l'import, mieux vaut relire quelques parties que d'en manquer une.
+SYNC_OVERLAP = timedelta(hours=1)
+
+# Hash volontairement invalide : un compte fantôme ne peut pas se connecter
+UNUSABLE_PASSWORD = "!"  # noqa: S105
+
+
+def get_watermark(
+    db: Session, user_id: int, provider: ProviderClient
+) -> datetime | None:
+    """
+    Date de la dernière synchronisation réussie d'un compte lié
+
+    Le watermark est propre au couple (utilisateur, fournisseur) : les
+    parties importées par la synchronisation d'un autre compte (où
+    l'utilisateur est l'adversaire) ne le font pas avancer.
+    """
+    column = getattr(User, provider.synced_at_attr)
+    return db.execute(select(column).where(User.id == user_id)).scalar()
+
+
+def set_watermark(
+    db: Session, user_id: int, provider: ProviderClient, synced_at: datetime
+) -> None:
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values({provider.synced_at_attr: synced_at}),
+    )
+    db.commit()
+
+
+def _lookup_players(db: Session, column: Any, names: set[str]) -> dict[str, int]:
+    # Trié pour que le dernier gagne : un compte réel l'emporte sur un
+    # fantôme portant le même pseudo
+    rows = db.execute(
+        select(func.lower(column), User.id)
+        .where(func.lower(column).in_(names))
+        .order_by(User.is_active.is_(True), User.id),
+    ).all()
+    return dict(rows)
+
+
+def resolve_players(
+    db: Session,
+    provider: ProviderClient,
+    usernames: set[str],
+) -> dict[str, int]:
+    """
+    Associer les pseudos d'un fournisseur aux utilisateurs locaux
+
+    Les adversaires sans compte reçoivent un utilisateur fantôme inactif,
+    rattaché au pseudo du fournisseur, pour satisfaire les clés étrangères
+    de `ChessGame`. Les fantômes sont créés avec ON CONFLICT DO NOTHING
+    puis relus : deux synchronisations concurrentes qui rencontrent le même
+    adversaire partagent le même fantôme.
+
+    Returns:
+        dict[str, int]: Pseudo en minuscules -> id utilisateur
+    """
+    column = getattr(User, provider.username_attr)
+    wanted = {name.lower() for name in usernames}
+    ids = _lookup_players(db, column, wanted)
+
+    missing = wanted - ids.keys()
+    if missing:
+        # Ordre fixe des insertions : pas d'interblocage entre deux syncs
+        placeholders = [
+            {
+                "email": f"{name}@{provider.name}.invalid",
+                "username": f"{name}@{provider.name}"[:100],
+                "hashed_password": UNUSABLE_PASSWORD,
+                "is_active": False,
+                provider.username_attr: name,
+            }
+            for name in sorted(missing)
+        ]
+        db.execute(insert(User).values(placeholders).on_conflict_do_nothing())
+        ids.update(_lookup_players(db, column, missing))
+
+    return ids
+
+
+def claim_placeholders(db: Session, user_id: int, provider: ProviderClient) -> int:
+    """
+    Rattacher à un utilisateur les parties de son compte fantôme
+
+    Quand un utilisateur lie un pseudo déjà rencontré comme adversaire, les
+    parties importées sous le fantôme lui sont réattribuées (empreintes
+    recalculées) et le fantôme est supprimé. Les parties qu'il possède déjà
+    sous son propre compte sont supprimées du fantôme.
+
+    Returns:
+        int: Nombre de parties réattribuées
+    """
+    column = getattr(User, provider.username_attr)
+    username = db.execute(select(column).where(User.id == user_id)).scalar()
+    if not username:
+        return 0
+    placeholder_ids = list(
+        db.execute(
+            select(User.id).where(
+                func.lower(column) == username.lower(),
+                User.hashed_password == UNUSABLE_PASSWORD,
+                User.is_active.is_not(True),
+                User.id != user_id,
+            ),
+        ).scalars(),
+    )
+    if not placeholder_ids:
+        return 0
+
+    games = db.execute(
+        select(
+            ChessGame.id,
+            ChessGame.white_player_id,
+            ChessGame.black_player_id,
+            ChessGame.game_date,
+            ChessGame.pgn,
+        ).where(
+            or_(
+                ChessGame.white_player_id.in_(placeholder_ids),
+                ChessGame.black_player_id.in_(placeholder_ids),
+            ),
+        ),
+    ).all()
+
+    by_hash: dict[str, dict[str, Any]] = {}
+    duplicates = []
+    for game in games:
+        row = game._asdict()
+        if row["white_player_id"] in placeholder_ids:
+            row["white_player_id"] = user_id
+        if row["black_player_id"] in placeholder_ids:
+            row["black_player_id"] = user_id
+        content_hash = game_content_hash(row)
+        if content_hash in by_hash:
+            duplicates.append(row["id"])
+            continue
+        by_hash[content_hash] = {
+            "id": row["id"],
+            "white_player_id": row["white_player_id"],
+            "black_player_id": row["black_player_id"],
+            "content_hash": content_hash,
+        }
+    # Copie déjà présente sous l'utilisateur : celle du fantôme est supprimée
+    known = existing_hashes(db, by_hash)
+    duplicates += [by_hash.pop(h)["id"] for h in known]
+    params = list(by_hash.values())
+
+    if duplicates:
+        db.execute(delete(ChessGame).where(ChessGame.id.in_(duplicates)))
+    if params:
+        db.execute(update(ChessGame), params)
+    db.execute(delete(User).where(User.id.in_(placeholder_ids)))
+    db.commit()
+
+    if params or duplicates:
+        rebuild_rating_history(db, user_id)
+    logger.info(
+        "Compte %s/%s : %d partie(s) reprise(s) au fantôme, %d doublon(s)",
+        provider.name,
+        username,
+        len(params),
+        len(duplicates),
+    )
+    return len(params)
+
+
+def _import_batch(
+    db: Session,
+    provider: ProviderClient,
+    batch: list[dict[str, Any]],
+) -> ImportResult:
+    usernames = {row["white_username"] for row in batch} | {
+        row["black_username"] for row in batch
+    }
+    ids = resolve_players(db, provider, usernames)
+
+    rows = []
+    for row in batch:
+        white = row.pop("white_username").lower()
+        black = row.pop("black_username").lower()
+        rows.append(
+            {**row, "white_player_id": ids[white], "black_player_id": ids[black]}
+        )
+
+    result = import_games(db, rows, batch_size=len(rows))
+    db.commit()  # Conserver les comptes fantômes même si tout était en double
+    return result
+
+
+class SyncScheduler:
+    """
+    Planifie la synchronisation de tous les comptes liés
+
+    Le nombre de comptes synchronisés simultanément est plafonné par
+    fournisseur ; chaque compte ne lit que les parties postérieures à son
+    watermark et les importe par lots au fil du flux.
+    """
+
+    def __init__(
+        self,
+        clients: dict[str, ProviderClient] | None = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_concurrency: int = settings.sync_max_concurrency,
+    ):
+        self.clients = clients if clients is not None else default_clients()
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self._slots = {
+            name: asyncio.Semaphore(max_concurrency) for name in self.clients
+        }
+
+    async def aclose(self) -> None:
+        for client in self.clients.values():
+            await client.aclose()
+
+    def _linked_accounts(self) -> list[tuple[int, str, ProviderClient]]:
+        with self.session_factory() as db:
+            users = db.execute(
+                select(User.id, User.chess_com_username, User.lichess_username).where(
+                    User.is_active.is_(True),
+                    or_(
+                        User.chess_com_username.is_not(None),
+                        User.lichess_username.is_not(None),
+                    ),
+                ),
+            ).all()
+
+        accounts = []
+        for user in users:
+            for client in self.clients.values():
+                username = getattr(user, client.username_attr)
+                if username:
+                    accounts.append((user.id, username, client))
+        return accounts
+
+    async def _import_stream(
+        self,
+        db: Session,
+        username: str,
+        client: ProviderClient,
+        since: datetime | None,
+    ) -> ImportResult:
+        total = ImportResult()
+        batch: list[dict[str, Any]] = []
+        async for row in client.iter_games(username, since):
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                result = await asyncio.to_thread(_import_batch, db, client, batch)
+                total.inserted_ids += result.inserted_ids
+                total.skipped += result.skipped
+                batch = []
+        if batch:
+            result = await asyncio.to_thread(_import_batch, db, client, batch)
+            total.inserted_ids += result.inserted_ids
+            total.skipped += result.skipped
+        return total
+
+    async def sync_account(
+        self,
+        user_id: int,
+        username: str,
+        client: ProviderClient,
+    ) -> ImportResult:
+        """Importer les nouvelles parties d'un compte lié"""
+        async with self._slots[client.name]:
+            with self.session_factory() as db:
+                await asyncio.to_thread(claim_placeholders, db, user_id, client)
+                watermark = await asyncio.to_thread(get_watermark, db, user_id, client)
+                since = watermark - SYNC_OVERLAP if watermark else None
+                # Pris avant la lecture : une partie finie pendant la sync
+                # sera relue la prochaine fois
+                started_at = datetime.now(UTC)
+
+                try:
+                    total = await self._import_stream(db, username, client, since)
+                    # Seulement après un parcours complet : une sync
+                    # interrompue reprend depuis l'ancien watermark
+                    await asyncio.to_thread(
+                        set_watermark, db, user_id, client, started_at
+                    )
+                except BaseException:
+                    # Sans ses validateurs, le mois en échec sera relu en
+                    # entier plutôt que sauté sur un 304
+                    client.discard_validators(username)
+                    raise
+                client.confirm_validators(username)
+
+        logger.info(
+            "Sync %s/%s : %d nouvelle(s) partie(s)",
+            client.name,
+            username,
+            total.inserted,
+        )
+        return total
+
+    async def run_once(self) -> int:
+        """
+        Synchroniser tous les comptes liés une fois
+
+        Returns:
+            int: Nombre total de parties importées
+        """
+        accounts = await asyncio.to_thread(self._linked_accounts)
+        results = await asyncio.gather(
+            *(self.sync_account(*account) for account in accounts),
+            return_exceptions=True,
+        )
+
+        imported = 0
+        for (_, username, client), result in zip(accounts, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.error("Sync %s/%s échouée : %s", client.name, username, result)
+            else:
+                imported += result.inserted
+        return imported
+
+    async def run_forever(
+        self,
+        interval: float = settings.sync_interval_seconds,
+    ) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(interval)
+
+
+async def main(*, once: bool = False) -> None:
+    scheduler = SyncScheduler()
+    try:
+        if once:
+            await scheduler.run_once()
+        else:
+            await scheduler.run_forever()
+    finally:
+        await scheduler.aclose()
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(once="--once" in sys.argv))
@@ -1,29 +1,232 @@
+import random
+import threading
+import time
 from collections.abc import Generator
+from contextvars import ContextVar
+from typing import Any
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import settings
 
-# Configuration de l'engine SQLAlchemy
-engine = create_engine(
-    settings.database_url,
-    # Configuration pour PostgreSQL
-    pool_pre_ping=True,  # Vérifier la connexion avant usage
-    pool_recycle=300,  # Recycler les connexions après 5min
-    pool_size=20,  # Nombre de connexions dans le pool
-    max_overflow=0,  # Pas de connexions supplémentaires
-    echo=settings.debug,  # Log SQL en mode debug
+# Les engines sont créés au premier usage et non à l'import : importer l'app
+# (workers, scripts, tests) n'ouvre aucune connexion
+_engine: Engine | None = None
+_replica_engines: list[Engine] | None = None
+_engine_lock = threading.Lock()
+
+# État de routage de la requête en cours (cf. middleware dans app.main) :
+# "primary_until" (timestamp) force le primaire, "wrote" signale un commit
+request_routing: ContextVar[dict[str, Any] | None] = ContextVar(
+    "request_routing",
+    default=None,
 )
 
+
+def pool_limits_for_workers(
+    workers: int,
+    max_connections: int,
+    max_overflow: int,
+) -> tuple[int, int]:
+    """
+    Taille du pool et débordement par processus, dans le budget de connexions
+
+    Chaque worker peut ouvrir au plus pool_size + max_overflow connexions ;
+    le total sur tous les workers ne dépasse pas `max_connections`. Le
+    débordement est réduit si la part d'un worker ne suffit pas.
+
+    Returns:
+        tuple[int, int]: (pool_size, max_overflow)
+
+    Raises:
+        ValueError: Moins d'une connexion par worker
+    """
+    per_worker = max_connections // max(1, workers)
+    if per_worker < 1:
+        msg = (
+            f"DB_MAX_CONNECTIONS={max_connections} ne suffit pas "
+            f"pour {workers} workers"
+        )
+        raise ValueError(msg)
+    overflow = min(max_overflow, per_worker - 1)
+    return per_worker - overflow, overflow
+
+
+def create_db_engine(url: str, pool_size: int | None, max_overflow: int) -> Engine:
+    """Créer un engine configuré pour PostgreSQL d'après les settings"""
+    if pool_size is None:
+        pool_size, max_overflow = pool_limits_for_workers(
+            settings.web_concurrency,
+            settings.db_max_connections,
+            max_overflow,
+        )
+    return create_engine(
+        url,
+        pool_pre_ping=True,  # Vérifier la connexion avant usage
+        pool_recycle=300,  # Recycler les connexions après 5min
+        pool_size=pool_size,  # Nombre de connexions dans le pool
+        max_overflow=max_overflow,  # Connexions supplémentaires
+        pool_timeout=settings.db_pool_timeout,
+        echo=settings.debug,  # Log SQL en mode debug
+    )
+
+
+def get_engine() -> Engine:
+    """Engine du primaire (écritures), créé au premier appel"""
+    global _engine  # noqa: PLW0603
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_db_engine(
+                    settings.database_url,
+                    settings.db_pool_size,
+                    settings.db_max_overflow,
+                )
+    return _engine
+
+
+def get_replica_engines() -> list[Engine]:
+    """Engines des réplicas en lecture (liste vide si non configurés)"""
+    global _replica_engines  # noqa: PLW0603
+    if _replica_engines is None:
+        with _engine_lock:
+            if _replica_engines is None:
+                _replica_engines = [
+                    create_db_engine(
+                        url,
+                        settings.db_replica_pool_size,
+                        settings.db_replica_max_overflow,
+                    )
+                    for url in settings.database_replica_urls
+                ]
+    return _replica_engines
+
+
+def dispose_engine() -> None:
+    """Fermer les connexions de tous les pools (arrêt de l'application)"""
+    global _engine, _replica_engines  # noqa: PLW0603
+    with _engine_lock:
+        for engine in [_engine, *(_replica_engines or [])]:
+            if engine is not None:
+                engine.dispose()
+        _engine = None
+        _replica_engines = None
+
+
+def pool_metrics() -> list[dict[str, Any]]:
+    """État des pools déjà créés, par rôle"""
+    engines = [("primary", _engine)] + [
+        ("replica", engine) for engine in _replica_engines or []
+    ]
+    return [
+        {
+            "role": role,
+            "url": engine.url.render_as_string(hide_password=True),
+            "size": engine.pool.size(),
+            "checked_in": engine.pool.checkedin(),
+            "checked_out": engine.pool.checkedout(),
+            "overflow": engine.pool.overflow(),
+        }
+        for role, engine in engines
+        if engine is not None
+    ]
+
+
+# Clients qui viennent d'écrire, vus par ce processus : utilisateur -> date
+# jusqu'à laquelle ses lectures restent sur le primaire
+_recent_writers: dict[str, float] = {}
+MAX_RECENT_WRITERS = 10_000
+
+
+def primary_until_for(user_key: str) -> float:
+    """Date jusqu'à laquelle un utilisateur lit sur le primaire (0 si aucune)"""
+    return _recent_writers.get(user_key, 0.0)
+
+
+def remember_write(user_key: str, until: float) -> None:
+    """Garder un utilisateur sur le primaire jusqu'à `until`"""
+    if len(_recent_writers) >= MAX_RECENT_WRITERS:
+        now = time.time()
+        for key in [k for k, v in _recent_writers.items() if v <= now]:
+            del _recent_writers[key]
+    _recent_writers[user_key] = until
+
+
+def _primary_is_sticky() -> bool:
+    routing = request_routing.get()
+    if routing is None:
+        return False
+    # Une écriture déjà validée pendant la requête compte aussi
+    return bool(routing.get("wrote")) or routing.get("primary_until", 0) > time.time()
+
+
+class RoutingSession(Session):
+    """
+    Session liée aux engines partagés au moment de la première requête
+
+    Les sessions ouvertes en lecture seule (`info={"read_only": True}`)
+    lisent sur un réplica, choisi une fois pour toute la session, sauf
+    pendant un flush, après une écriture de la session elle-même, ou si le
+    client vient d'écrire (read-your-writes).
+    """
+
+    def get_bind(self, mapper: Any = None, **kw: Any) -> Any:
+        if self.bind is not None:
+            return super().get_bind(mapper, **kw)
+
+        if (
+            self.info.get("read_only")
+            and not self.info.get("wrote")
+            and not self._flushing
+            and not _primary_is_sticky()
+        ):
+            # Un seul réplica par session : toutes ses lectures voient le
+            # même état, même si les réplicas n'ont pas le même retard
+            replica = self.info.get("replica")
+            if replica is None:
+                replicas = get_replica_engines()
+                if replicas:
+                    replica = random.choice(replicas)  # noqa: S311
+                    self.info["replica"] = replica
+            if replica is not None:
+                return replica
+        return get_engine()
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_session_wrote(session: Session, flush_context: Any) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state: Any) -> None:
+    # insert()/update()/delete() exécutés directement, sans flush
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _mark_request_wrote(session: Session) -> None:
+    routing = request_routing.get()
+    if session.info.get("wrote") and routing is not None:
+        routing["wrote"] = True
+
+
 # Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 
 # Base pour les modèles
 Base = declarative_base()
 
 
+def read_session() -> Session:
+    """Session en lecture seule, routée vers un réplica si possible"""
+    return SessionLocal(info={"read_only": True})
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     Générateur de session de base de données pour FastAPI dependency injection
@@ -40,16 +243,27 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def get_read_db() -> Generator[Session, None, None]:
+    """
+    Comme `get_db`, pour les routes qui ne font que lire (stats, listes)
+    """
+    db = read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def create_tables():
     """
     Créer toutes les tables (utile pour les tests ou premier démarrage)
     En production, utiliser Alembic pour les migrations
     """
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
 
 
 def drop_tables():
     """
     Supprimer toutes les tables (utile pour les tests)
     """
-    Base.metadata.drop_all(bind=engine)
+    Base.metadata.drop_all(bind=get_engine())
@@ -8,6 +8,8 @@ from sqlalchemy import (
     Float,
     ForeignKey,
     JSON,
+    Index,
+    LargeBinary,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -17,6 +19,14 @@ from app.db.database import Base
 
 class ChessGame(Base):
     __tablename__ = "chess_games"
+    __table_args__ = (
+        # Parties d'un joueur dans l'ordre chronologique (export, historique)
+        Index("ix_chess_games_white_player_date", "white_player_id", "game_date"),
+        Index("ix_chess_games_black_player_date", "black_player_id", "game_date"),
+        # Pires coups d'un joueur, côté blancs et côté noirs
+        Index("ix_chess_games_white_player_loss", "white_player_id", "max_loss_white"),
+        Index("ix_chess_games_black_player_loss", "black_player_id", "max_loss_black"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -26,6 +36,10 @@ class ChessGame(Base):
     chess_com_url = Column(Text, nullable=True)
     lichess_url = Column(Text, nullable=True)
 
+    # Empreinte du contenu (joueurs, date, coups UCI normalisés) pour la
+    # déduplication entre imports, indépendamment des identifiants externes
+    content_hash = Column(String(64), unique=True, index=True, nullable=True)
+
     # Relations avec les joueurs
     white_player_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     black_player_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -71,11 +85,25 @@ class ChessGame(Base):
 
     # Analyse
     analyzed = Column(Boolean, default=False)
-    engine_evaluation = Column(JSON, nullable=True)
+    engine_evaluation = Column(JSON, nullable=True)  # Métadonnées (moteur, profondeur)
     blunders_count = Column(Integer, nullable=True)
     accuracy_white = Column(Float, nullable=True)
     accuracy_black = Column(Float, nullable=True)
 
+    # Évaluations par demi-coup, compactées (cf. app.core.evaluation)
+    evals_packed = Column(LargeBinary, nullable=True)
+
+    # Résumé de l'analyse, indexé pour les requêtes
+    first_blunder_ply = Column(Integer, nullable=True, index=True)
+    last_blunder_ply = Column(Integer, nullable=True, index=True)
+    max_eval_swing = Column(Integer, nullable=True, index=True)  # En centipawns
+    max_loss_white = Column(Integer, nullable=True)  # Pire coup blanc (centipawns)
+    max_loss_black = Column(Integer, nullable=True)  # Pire coup noir (centipawns)
+    accuracy_opening = Column(Float, nullable=True)
+    accuracy_middlegame = Column(Float, nullable=True)
+    accuracy_endgame = Column(Float, nullable=True)
+    puzzles_extracted = Column(Boolean, default=False)
+
     # Timestamps
     retrieved_at = Column(DateTime(timezone=True), server_default=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
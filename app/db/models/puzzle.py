@@ -0,0 +1,53 @@
+import random
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+
+
+class Puzzle(Base):
+    __tablename__ = "puzzles"
+    __table_args__ = (
+        UniqueConstraint("game_id", "ply", name="uq_puzzles_game_ply"),
+        Index("ix_puzzles_user_theme_rating", "user_id", "theme", "rating"),
+        # Tirage aléatoire indexé : random_key >= r ORDER BY random_key
+        Index("ix_puzzles_user_random", "user_id", "random_key"),
+        Index("ix_puzzles_user_theme_random", "user_id", "theme", "random_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    game_id = Column(
+        Integer, ForeignKey("chess_games.id", ondelete="CASCADE"), nullable=False
+    )
+
+    # Relations
+    game = relationship("ChessGame")
+
+    # Position à résoudre (avant le coup manqué)
+    ply = Column(Integer, nullable=False)
+    fen = Column(String(100), nullable=False)
+    solution = Column(String(200), nullable=False)  # Coups UCI séparés par " "
+
+    theme = Column(String(30), nullable=False)  # "mateIn2", "crushing", ...
+    rating = Column(Integer, nullable=False)
+    random_key = Column(Float, nullable=False, default=random.random)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<Puzzle(id={self.id}, game_id={self.game_id}, theme='{self.theme}')>"
@@ -0,0 +1,45 @@
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+
+from app.db.database import Base
+
+
+class RatingBucket(Base):
+    """Classement d'un joueur agrégé par jour / semaine / mois"""
+
+    __tablename__ = "rating_buckets"
+    __table_args__ = (
+        # Clé de l'upsert, et index de lecture de l'historique dans l'ordre
+        UniqueConstraint(
+            "user_id",
+            "time_class",
+            "bucket",
+            "bucket_start",
+            name="uq_rating_buckets_user_class_bucket_start",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    time_class = Column(String(20), nullable=False)  # "unknown" si non renseigné
+    bucket = Column(String(5), nullable=False)  # "day", "week", "month"
+    bucket_start = Column(Date, nullable=False)  # Lundi pour "week", 1er pour "month"
+
+    # Agrégats sur les parties de la période
+    last_rating = Column(Integer, nullable=False)
+    last_game_date = Column(DateTime(timezone=True), nullable=False)
+    min_rating = Column(Integer, nullable=False)
+    max_rating = Column(Integer, nullable=False)
+    games_count = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<RatingBucket(user_id={self.user_id}, {self.bucket}={self.bucket_start}, rating={self.last_rating})>"
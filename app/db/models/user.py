@@ -35,6 +35,10 @@ class User(Base):
     chess_com_username = Column(String(100), nullable=True)
     lichess_username = Column(String(100), nullable=True)
 
+    # Dernière synchronisation réussie de chaque compte lié (watermark)
+    chess_com_synced_at = Column(DateTime(timezone=True), nullable=True)
+    lichess_synced_at = Column(DateTime(timezone=True), nullable=True)
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
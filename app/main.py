@@ -1,16 +1,93 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
+from app.core.engine_queue import close_queue, get_queue
+from app.core.engine_worker import EngineWorker
+from app.core.security import token_subject
+from app.db.database import (
+    dispose_engine,
+    primary_until_for,
+    remember_write,
+    request_routing,
+)
+
+from .router import auth, chess, games, health, position, puzzles, users
+
+# Cookie read-your-writes : jusqu'à quand lire sur le primaire
+PRIMARY_UNTIL_COOKIE = "db_primary_until"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Rien de lourd au démarrage : l'engine et son pool sont créés à la
+    # première requête qui en a besoin
+    worker = None
+    if settings.engine_queue and not settings.redis_url:
+        # Sans Redis, le worker moteur tourne dans le processus de l'API
+        worker = asyncio.create_task(EngineWorker(get_queue()).run())
+    yield
+    if worker is not None:
+        worker.cancel()
+        with suppress(asyncio.CancelledError):
+            await worker
+    await close_queue()
+    dispose_engine()
 
-from .router import auth, chess, users
 
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
+
+def _request_user(request: Request) -> str | None:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    return token_subject(token) if scheme.lower() == "bearer" and token else None
+
+
+if settings.database_replica_urls:
+
+    @app.middleware("http")
+    async def read_your_writes(
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]],
+    ) -> Response:
+        # Deux marqueurs : l'utilisateur du jeton (connu de ce worker) et le
+        # cookie, seul partagé entre workers mais envoyé par un front
+        # cross-origin uniquement avec `credentials: "include"`
+        user = _request_user(request)
+        try:
+            primary_until = float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0))
+        except ValueError:
+            primary_until = 0.0
+        if user is not None:
+            primary_until = max(primary_until, primary_until_for(user))
+        routing = {"primary_until": primary_until, "wrote": False}
+        request_routing.set(routing)
+
+        response = await call_next(request)
+        if routing["wrote"]:
+            until = time.time() + settings.read_your_writes_seconds
+            if user is not None:
+                remember_write(user, until)
+            response.set_cookie(
+                PRIMARY_UNTIL_COOKIE,
+                str(until),
+                max_age=settings.read_your_writes_seconds,
+                httponly=True,
+                samesite="lax",
+            )
+        return response
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,  # URL de votre app React
@@ -20,5 +97,9 @@ app.add_middleware(
 )
 
 app.include_router(chess.router, tags=["chess"])
+app.include_router(position.router, tags=["position"])
 app.include_router(auth.router, tags=["auth"])
 app.include_router(users.router, tags=["users"])
+app.include_router(games.router, tags=["games"])
+app.include_router(puzzles.router, tags=["puzzles"])
+app.include_router(health.router, tags=["health"])
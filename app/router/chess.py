@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import subprocess
+from contextlib import aclosing
 
 import chess
 import chess.engine
@@ -8,16 +9,67 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from app.config import settings
+from app.core.engine_queue import (
+    EngineJob,
+    EngineJobError,
+    NoWorkerError,
+    QueueFullError,
+    analyse,
+    stream_job,
+)
+
 router = APIRouter()
 
 logging.basicConfig(level=logging.INFO)
-STOCKFISH_PATH = "/home/alexis/chessEngine/stockfish/stockfish"
+STOCKFISH_PATH = settings.stockfish_path
 
 
 class PositionRequest(BaseModel):
     fen: str
 
 
+async def _queued_analysis(fen: str) -> dict | JSONResponse:
+    try:
+        return await analyse(EngineJob(fen=fen, time_limit=1.0))
+    except (QueueFullError, NoWorkerError) as e:
+        # Contre-pression : le client réessaie plus tard
+        return JSONResponse(
+            status_code=503,
+            content={"error": str(e)},
+            headers={"Retry-After": "1"},
+        )
+    except TimeoutError:
+        return JSONResponse(status_code=504, content={"error": "Analysis timed out"})
+    except EngineJobError as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+async def _queued_websocket(websocket: WebSocket) -> None:
+    try:
+        while True:
+            fen = await websocket.receive_text()
+            logging.info("FEN received: %s", fen)
+
+            try:
+                chess.Board(fen)
+            except ValueError:
+                await websocket.send_json({"error": "Invalid FEN"})
+                continue
+
+            job = EngineJob(fen=fen, mode="stream", depth=settings.engine_stream_depth)
+            try:
+                async with aclosing(stream_job(job)) as messages:
+                    async for data in messages:
+                        await websocket.send_json(data)
+            except (QueueFullError, NoWorkerError) as e:
+                await websocket.send_json({"error": str(e)})
+            except (TimeoutError, EngineJobError):
+                await websocket.send_json({"error": "Analysis failed"})
+    except WebSocketDisconnect:
+        logging.info("WebSocket disconnected")
+
+
 @router.post("/analyze")
 async def analyze_position(data: PositionRequest):
     fen = data.fen
@@ -26,6 +78,9 @@ async def analyze_position(data: PositionRequest):
     except ValueError:
         return JSONResponse(status_code=400, content={"error": "Invalid FEN"})
 
+    if settings.engine_queue:
+        return await _queued_analysis(fen)
+
     try:
         with chess.engine.SimpleEngine.popen_uci(STOCKFISH_PATH) as engine:
             engine.configure({"Threads": 4, "Hash": 512})
@@ -68,6 +123,10 @@ async def check_stockfish():
 async def websocket_analyze(websocket: WebSocket):
     await websocket.accept()
     logging.info("WebSocket connected")
+    if settings.engine_queue:
+        await _queued_websocket(websocket)
+        return
+
     engine = None
 
     try:
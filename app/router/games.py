@@ -0,0 +1,176 @@
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.core.export import ExportFilters, gzip_stream, iter_ndjson, iter_pgn
+from app.core.security import get_current_active_user
+from app.db.database import get_read_db
+from app.db.models.chess import ChessGame
+from app.db.models.rating import RatingBucket
+from app.db.models.user import User
+from app.schemas.analysis import GameAnalysisSummary, WorstMove
+from app.schemas.rating import RatingHistory, RatingSeries
+
+router = APIRouter()
+
+read_db_dependency = Annotated[Session, Depends(get_read_db)]
+user_dependency = Annotated[User, Depends(get_current_active_user)]
+
+
+def _export_response(
+    chunks: Iterator[bytes],
+    media_type: str,
+    filename: str,
+    *,
+    gzip: bool,
+) -> StreamingResponse:
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        chunks = gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+@router.get("/users/me/games.pgn")
+async def export_games_pgn(
+    current_user: user_dependency,
+    time_class: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    rated: bool | None = None,
+    gzip: bool = False,
+):
+    filters = ExportFilters(time_class, since, until, rated)
+    return _export_response(
+        iter_pgn(current_user.id, filters),
+        "application/x-chess-pgn",
+        "games.pgn",
+        gzip=gzip,
+    )
+
+
+@router.get("/users/me/games.ndjson")
+async def export_games_ndjson(
+    current_user: user_dependency,
+    time_class: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    rated: bool | None = None,
+    gzip: bool = False,
+):
+    filters = ExportFilters(time_class, since, until, rated)
+    return _export_response(
+        iter_ndjson(current_user.id, filters),
+        "application/x-ndjson",
+        "games.ndjson",
+        gzip=gzip,
+    )
+
+
+@router.get("/users/me/games/blunders", response_model=list[GameAnalysisSummary])
+async def games_with_blunder_after(
+    current_user: user_dependency,
+    db: read_db_dependency,
+    after_move: Annotated[int, Query(ge=0)] = 20,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+):
+    # last_blunder_ply est indexé : pas de lecture du JSON d'analyse
+    stmt = (
+        select(
+            ChessGame.id,
+            ChessGame.game_date,
+            ChessGame.time_class,
+            ChessGame.result,
+            ChessGame.first_blunder_ply,
+            ChessGame.last_blunder_ply,
+            ChessGame.max_eval_swing,
+            ChessGame.accuracy_white,
+            ChessGame.accuracy_black,
+        )
+        .where(
+            or_(
+                ChessGame.white_player_id == current_user.id,
+                ChessGame.black_player_id == current_user.id,
+            ),
+            ChessGame.last_blunder_ply > after_move * 2,
+        )
+        .order_by(ChessGame.game_date.desc())
+        .limit(limit)
+    )
+    return db.execute(stmt).all()
+
+
+@router.get("/users/me/worst-moves", response_model=list[WorstMove])
+async def worst_moves(
+    current_user: user_dependency,
+    db: read_db_dependency,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+):
+    # NumPy n'est chargé qu'ici, pas au démarrage de l'API
+    from app.core.evaluation import unpack_evals, worst_move_ply  # noqa: PLC0415
+
+    moves = []
+    for color, player_id, max_loss in (
+        ("white", ChessGame.white_player_id, ChessGame.max_loss_white),
+        ("black", ChessGame.black_player_id, ChessGame.max_loss_black),
+    ):
+        # Une requête par couleur, chacune servie par l'index (joueur, perte)
+        stmt = (
+            select(ChessGame.id, ChessGame.game_date, ChessGame.evals_packed, max_loss)
+            .where(player_id == current_user.id, max_loss.is_not(None))
+            .order_by(max_loss.desc())
+            .limit(limit)
+        )
+        for game_id, game_date, packed, loss in db.execute(stmt):
+            ply = worst_move_ply(unpack_evals(packed), color) if packed else None
+            moves.append(
+                WorstMove(
+                    game_id=game_id,
+                    game_date=game_date,
+                    color=color,
+                    ply=ply,
+                    move_number=(ply + 1) // 2 if ply else None,
+                    loss_cp=loss,
+                ),
+            )
+
+    return sorted(moves, key=lambda move: move.loss_cp, reverse=True)[:limit]
+
+
+@router.get("/users/me/rating-history", response_model=RatingHistory)
+async def rating_history(
+    current_user: user_dependency,
+    db: read_db_dependency,
+    time_class: str | None = None,
+    bucket: Literal["day", "week", "month"] = "week",
+):
+    # Lecture des agrégats pré-calculés, dans l'ordre de l'index unique
+    stmt = select(
+        RatingBucket.time_class,
+        RatingBucket.bucket_start,
+        RatingBucket.last_rating,
+        RatingBucket.min_rating,
+        RatingBucket.max_rating,
+        RatingBucket.games_count,
+    ).where(RatingBucket.user_id == current_user.id, RatingBucket.bucket == bucket)
+    if time_class is not None:
+        stmt = stmt.where(RatingBucket.time_class == time_class)
+    stmt = stmt.order_by(RatingBucket.time_class, RatingBucket.bucket_start)
+
+    series: dict[str, RatingSeries] = {}
+    for row in db.execute(stmt):
+        current = series.get(row.time_class)
+        if current is None:
+            current = series[row.time_class] = RatingSeries(time_class=row.time_class)
+        current.bucket_start.append(row.bucket_start)
+        current.last_rating.append(row.last_rating)
+        current.min_rating.append(row.min_rating)
+        current.max_rating.append(row.max_rating)
+        current.games_count.append(row.games_count)
+
+    return RatingHistory(bucket=bucket, series=list(series.values()))
@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+
+from app.config import settings
+from app.core.engine_queue import get_queue
+from app.db.database import pool_metrics
+
+router = APIRouter()
+
+
+@router.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@router.get("/health/db")
+async def database_pools():
+    # Seuls les pools déjà ouverts par ce worker apparaissent
+    return {"pools": pool_metrics()}
+
+
+@router.get("/health/engine")
+async def engine_queue():
+    if not settings.engine_queue:
+        return {"queue": None}
+    queue = get_queue()
+    return {
+        "queue": queue.name,
+        "queued_jobs": await queue.depth(),
+        "workers": await queue.workers(),
+    }
@@ -0,0 +1,124 @@
+from functools import lru_cache
+
+from fastapi import APIRouter, Response
+from fastapi.responses import JSONResponse
+
+from app.core.position import (
+    POSITION_CACHE_SIZE,
+    AppliedMove,
+    PositionInfo,
+    apply_move,
+    get_position,
+)
+from app.schemas.position import (
+    ApplyMoveRequest,
+    ApplyMoveResponse,
+    BatchApplyMoveRequest,
+    BatchPositionRequest,
+    MoveResponse,
+    PositionError,
+    PositionRequest,
+    PositionResponse,
+)
+
+router = APIRouter()
+
+ERROR_RESPONSES = {400: {"model": PositionError}}
+
+
+# Les réponses sont sérialisées une fois par position puis renvoyées telles
+# quelles : pas de revalidation Pydantic à chaque requête
+@lru_cache(maxsize=POSITION_CACHE_SIZE)
+def _position_json(info: PositionInfo) -> bytes:
+    return (
+        PositionResponse(
+            fen=info.fen,
+            turn=info.turn,
+            legal_moves=[
+                MoveResponse(uci=uci, san=san) for uci, san in info.legal_moves
+            ],
+            is_check=info.is_check,
+            is_checkmate=info.is_checkmate,
+            is_stalemate=info.is_stalemate,
+            is_game_over=info.is_game_over,
+            result=info.result,
+        )
+        .model_dump_json()
+        .encode()
+    )
+
+
+def _applied_json(applied: AppliedMove) -> bytes:
+    move = MoveResponse(uci=applied.uci, san=applied.san).model_dump_json().encode()
+    return b'{"move":%b,"position":%b}' % (move, _position_json(applied.position))
+
+
+def _try_position(fen: str) -> bytes | PositionError:
+    try:
+        return _position_json(get_position(fen))
+    except ValueError:
+        return PositionError(fen=fen, error="Invalid FEN")
+
+
+def _try_apply(fen: str, move: str) -> bytes | PositionError:
+    try:
+        get_position(fen)
+    except ValueError:
+        return PositionError(fen=fen, error="Invalid FEN")
+    try:
+        return _applied_json(apply_move(fen, move))
+    except ValueError:
+        return PositionError(fen=fen, error="Illegal move")
+
+
+def _json_response(result: bytes | PositionError) -> Response:
+    # Même forme d'erreur que les éléments des requêtes groupées
+    if isinstance(result, PositionError):
+        return JSONResponse(status_code=400, content=result.model_dump())
+    return Response(content=result, media_type="application/json")
+
+
+def _json_list_response(results: list[bytes | PositionError]) -> Response:
+    items = [
+        item.model_dump_json().encode() if isinstance(item, PositionError) else item
+        for item in results
+    ]
+    return Response(
+        content=b"[" + b",".join(items) + b"]", media_type="application/json"
+    )
+
+
+@router.post(
+    "/position/moves",
+    response_model=PositionResponse,
+    responses=ERROR_RESPONSES,
+)
+async def legal_moves(data: PositionRequest):
+    return _json_response(_try_position(data.fen))
+
+
+@router.post(
+    "/position/apply",
+    response_model=ApplyMoveResponse,
+    responses=ERROR_RESPONSES,
+)
+async def play_move(data: ApplyMoveRequest):
+    return _json_response(_try_apply(data.fen, data.move))
+
+
+@router.post(
+    "/position/moves/batch",
+    response_model=list[PositionResponse | PositionError],
+)
+async def legal_moves_batch(data: BatchPositionRequest):
+    return _json_list_response([_try_position(item.fen) for item in data.positions])
+
+
+@router.post(
+    "/position/apply/batch",
+    response_model=list[ApplyMoveResponse | PositionError],
+)
+async def play_moves_batch(data: BatchApplyMoveRequest):
+    return _json_list_response(
+        [_try_apply(item.fen, item.move) for item in data.moves],
+    )
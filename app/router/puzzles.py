@@ -0,0 +1,53 @@
+import random
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.security import get_current_active_user
+from app.db.database import get_read_db
+from app.db.models.puzzle import Puzzle
+from app.db.models.user import User
+from app.schemas.puzzle import PuzzleResponse
+
+router = APIRouter()
+
+read_db_dependency = Annotated[Session, Depends(get_read_db)]
+user_dependency = Annotated[User, Depends(get_current_active_user)]
+
+
+@router.get("/users/me/puzzles", response_model=list[PuzzleResponse])
+async def random_puzzles(
+    current_user: user_dependency,
+    db: read_db_dependency,
+    theme: str | None = None,
+    min_rating: int | None = None,
+    max_rating: int | None = None,
+    limit: Annotated[int, Query(ge=1, le=50)] = 10,
+):
+    stmt = select(Puzzle).where(Puzzle.user_id == current_user.id)
+    if theme is not None:
+        stmt = stmt.where(Puzzle.theme == theme)
+    if min_rating is not None:
+        stmt = stmt.where(Puzzle.rating >= min_rating)
+    if max_rating is not None:
+        stmt = stmt.where(Puzzle.rating <= max_rating)
+
+    # Tirage sans ORDER BY random() : on part d'une clé aléatoire et on
+    # parcourt l'index (user_id, [theme,] random_key), en bouclant au début
+    pivot = random.random()  # noqa: S311
+    puzzles = list(
+        db.scalars(
+            stmt.where(Puzzle.random_key >= pivot)
+            .order_by(Puzzle.random_key)
+            .limit(limit),
+        ),
+    )
+    if len(puzzles) < limit:
+        puzzles += db.scalars(
+            stmt.where(Puzzle.random_key < pivot)
+            .order_by(Puzzle.random_key)
+            .limit(limit - len(puzzles)),
+        )
+    return puzzles
@@ -0,0 +1,67 @@
+from datetime import datetime
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+# Valeur attribuée à un mat (même convention que `score(mate_score=10000)`)
+MATE_SCORE = 10000
+
+
+# Format attendu de `ChessGame.engine_evaluation` avant normalisation
+class EngineEvaluation(BaseModel):
+    # Les autres clés du JSON libre (best_moves, pv...) sont conservées
+    model_config = ConfigDict(extra="allow")
+
+    engine: Optional[str] = None
+    depth: Optional[int] = None
+    # Une évaluation par position, en centipawns du point de vue des blancs :
+    # evals[0] = position initiale, evals[i] = position après le demi-coup i
+    evals: list[int] = Field(default_factory=list)
+
+    @field_validator("evals", mode="before")
+    @classmethod
+    def normalize_evals(cls, v: Any) -> list[int]:
+        # ValueError et non TypeError : pydantic n'en fait une erreur de
+        # validation que dans ce cas
+        if not isinstance(v, (list, tuple)):
+            raise ValueError(f"Liste d'évaluations attendue : {v!r}")
+        evals = []
+        for item in v:
+            try:
+                cp = item
+                if isinstance(item, dict):
+                    # {"cp": 35} ou {"mate": -3}
+                    if item.get("mate") is not None:
+                        mate = int(item["mate"])
+                        cp = (MATE_SCORE - abs(mate)) * (1 if mate > 0 else -1)
+                    else:
+                        cp = item["cp"]
+                evals.append(max(-MATE_SCORE, min(MATE_SCORE, round(cp))))
+            except (KeyError, TypeError, OverflowError) as e:
+                raise ValueError(f"Évaluation invalide : {item!r}") from e
+        return evals
+
+
+# Partie résumée pour les recherches sur l'analyse
+class GameAnalysisSummary(BaseModel):
+    id: int
+    game_date: datetime
+    time_class: Optional[str]
+    result: str
+    first_blunder_ply: Optional[int]
+    last_blunder_ply: Optional[int]
+    max_eval_swing: Optional[int]
+    accuracy_white: Optional[float]
+    accuracy_black: Optional[float]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Pire coup d'un joueur dans une partie
+class WorstMove(BaseModel):
+    game_id: int
+    game_date: datetime
+    color: Literal["white", "black"]
+    ply: Optional[int]
+    move_number: Optional[int]
+    loss_cp: int
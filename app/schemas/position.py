@@ -0,0 +1,52 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+# Nombre maximal de positions par requête groupée
+MAX_BATCH_SIZE = 500
+
+
+class PositionRequest(BaseModel):
+    fen: str = Field(..., max_length=100)
+
+
+class ApplyMoveRequest(PositionRequest):
+    move: str = Field(..., max_length=10)  # UCI (e2e4) ou SAN (e4)
+
+
+class BatchPositionRequest(BaseModel):
+    positions: list[PositionRequest] = Field(..., max_length=MAX_BATCH_SIZE)
+
+
+class BatchApplyMoveRequest(BaseModel):
+    moves: list[ApplyMoveRequest] = Field(..., max_length=MAX_BATCH_SIZE)
+
+
+class MoveResponse(BaseModel):
+    uci: str
+    san: str
+
+
+class PositionResponse(BaseModel):
+    fen: str
+    turn: Literal["white", "black"]
+    legal_moves: list[MoveResponse]
+    is_check: bool
+    is_checkmate: bool
+    is_stalemate: bool
+    is_game_over: bool
+    result: Optional[str]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ApplyMoveResponse(BaseModel):
+    move: MoveResponse
+    position: PositionResponse
+
+
+# Position ou coup refusé : corps des réponses 400, et élément en erreur
+# d'une requête groupée (les autres sont traités)
+class PositionError(BaseModel):
+    fen: str
+    error: str
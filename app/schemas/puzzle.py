@@ -0,0 +1,21 @@
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, field_validator
+
+
+# Pour les réponses
+class PuzzleResponse(BaseModel):
+    id: int
+    game_id: int
+    ply: int
+    fen: str
+    solution: list[str]  # Coups UCI, en commençant par celui du joueur
+    theme: str
+    rating: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("solution", mode="before")
+    @classmethod
+    def split_solution(cls, v: Any) -> Any:
+        return v.split() if isinstance(v, str) else v
@@ -0,0 +1,18 @@
+from datetime import date
+
+from pydantic import BaseModel
+
+
+# Historique en colonnes : un tableau par champ, même longueur, même ordre
+class RatingSeries(BaseModel):
+    time_class: str
+    bucket_start: list[date] = []
+    last_rating: list[int] = []
+    min_rating: list[int] = []
+    max_rating: list[int] = []
+    games_count: list[int] = []
+
+
+class RatingHistory(BaseModel):
+    bucket: str
+    series: list[RatingSeries]
@@ -4,8 +4,10 @@ Script pour créer toutes les tables de la base de données
 Usage: python create_db.py
 """
 
-from app.db.database import Base, engine, create_tables, drop_tables
+from app.db.database import Base, create_tables, drop_tables
 from app.db.models.chess import ChessGame, GamePosition
+from app.db.models.puzzle import Puzzle
+from app.db.models.rating import RatingBucket
 from app.db.models.user import User  # si vous en avez un
 # from app.db.models.chess_game import ChessGame  # Quand tu l'auras
 
@@ -1,4 +1,57 @@
+"""
+Lancer l'API
+Usage: python run.py [--prod] [--workers N] [--host HOST] [--port PORT]
+
+Sans --prod : un seul processus avec rechargement automatique (développement).
+Avec --prod : N workers sans reload ; WEB_CONCURRENCY est transmis aux
+workers pour dimensionner leur pool de connexions.
+"""
+
+import argparse
+import os
+
 import uvicorn
 
+
+def main():
+    parser = argparse.ArgumentParser(description="Lancer l'API")
+    parser.add_argument("--prod", action="store_true", help="Mode production")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if not args.prod:
+        uvicorn.run("app.main:app", host=args.host, port=args.port, reload=True)
+        return
+
+    workers = args.workers or int(
+        os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)
+    )
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    # Refuser de démarrer plutôt que d'échouer à la première requête
+    from app.config import settings  # noqa: PLC0415
+    from app.db.database import pool_limits_for_workers  # noqa: PLC0415
+
+    try:
+        pool_limits_for_workers(
+            workers,
+            settings.db_max_connections,
+            settings.db_max_overflow,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        reload=False,
+        proxy_headers=True,
+        access_log=False,
+    )
+
+
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    main()
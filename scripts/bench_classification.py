@@ -0,0 +1,67 @@
+"""
+Benchmark de la classification vectorisée des coups
+Usage: python -m scripts.bench_classification [--games 100000] [--from-db]
+
+Par défaut, les évaluations sont générées (marche aléatoire réaliste) ; avec
+--from-db, les `evals_packed` des parties stockées sont lues en base.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.core.classification import classify_batch
+
+
+def synthetic_series(n_games: int, seed: int = 0) -> list[np.ndarray]:
+    """Séries d'évaluations aléatoires de 20 à 160 demi-coups"""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(21, 161, size=n_games)
+    steps = rng.normal(0, 60, size=lengths.sum()).astype(np.int64)
+    flat = np.clip(np.cumsum(steps), -10000, 10000).astype("<i2")
+    return np.split(flat, np.cumsum(lengths)[:-1])
+
+
+def stored_series(n_games: int) -> list[np.ndarray]:
+    from sqlalchemy import select
+
+    from app.db.database import SessionLocal
+    from app.db.models.chess import ChessGame
+
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(ChessGame.evals_packed)
+            .where(ChessGame.evals_packed.is_not(None))
+            .limit(n_games)
+            .execution_options(yield_per=10000),
+        ).scalars()
+        return [np.frombuffer(packed, dtype="<i2") for packed in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--from-db", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    series = stored_series(args.games) if args.from_db else synthetic_series(args.games)
+    load_time = time.perf_counter() - start
+    n_moves = sum(len(evals) - 1 for evals in series)
+
+    start = time.perf_counter()
+    for i in range(0, len(series), args.batch_size):
+        classify_batch(series[i : i + args.batch_size])
+    elapsed = time.perf_counter() - start
+
+    print(f"Parties      : {len(series)} ({n_moves} coups)")
+    print(f"Chargement   : {load_time:.2f}s")
+    print(f"Classement   : {elapsed:.2f}s")
+    print(f"Débit        : {len(series) / elapsed:,.0f} parties/s")
+    print(f"               {n_moves / elapsed:,.0f} coups/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark du service de positions (requêtes/s sur un cœur)
+Usage: python -m scripts.bench_position [--requests 20000]
+
+Les requêtes passent par l'application ASGI complète (validation,
+sérialisation) dans un seul processus et une seule boucle d'événements,
+sur les positions d'une partie réelle rejouées en boucle.
+"""
+
+import argparse
+import asyncio
+import io
+import time
+
+import chess.pgn
+import httpx
+
+from app.core.position import _apply_move, _board, _position_info, cache_info
+from app.main import app
+from app.router.position import _position_json
+
+SAMPLE_PGN = """
+1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 4. Ba4 Nf6 5. O-O Be7 6. Re1 b5 7. Bb3 d6
+8. c3 O-O 9. h3 Nb8 10. d4 Nbd7 11. c4 c6 12. cxb5 axb5 13. Nc3 Bb7
+14. Bg5 b4 15. Nb1 h6 16. Bh4 c5 17. dxe5 Nxe4 18. Bxe7 Qxe7 19. exd6 Qf6
+20. Nbd2 Nxd6 21. Nc4 Nxc4 22. Bxc4 Nb6 23. Ne5 Rae8 24. Bxf7+ Rxf7
+25. Nxf7 Rxe1+ 26. Qxe1 Kxf7 27. Qe3 Qg5 28. Qxg5 hxg5 29. b3 Ke6 30. a3 Kd6
+"""
+
+
+def sample_moves() -> list[tuple[str, str]]:
+    game = chess.pgn.read_game(io.StringIO(SAMPLE_PGN))
+    board = game.board()
+    moves = []
+    for move in game.mainline_moves():
+        moves.append((board.fen(), move.uci()))
+        board.push(move)
+    return moves
+
+
+async def run(path: str, payloads: list[dict], n_requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        start = time.perf_counter()
+        for i in range(n_requests):
+            response = await client.post(path, json=payloads[i % len(payloads)])
+            response.raise_for_status()
+        return n_requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    moves = sample_moves()
+    positions = [{"fen": fen} for fen, _ in moves]
+    applies = [{"fen": fen, "move": uci} for fen, uci in moves]
+    batch = [{"positions": positions}]
+
+    for label, path, payloads, n in (
+        ("moves", "/position/moves", positions, args.requests),
+        ("apply", "/position/apply", applies, args.requests),
+        ("moves/batch", "/position/moves/batch", batch, args.requests // 50),
+    ):
+        _board.cache_clear()
+        _position_info.cache_clear()
+        _apply_move.cache_clear()
+        _position_json.cache_clear()
+        rate = asyncio.run(run(path, payloads, n))
+        print(f"{label:<12}: {rate:,.0f} req/s  (cache {cache_info()})")
+
+
+if __name__ == "__main__":
+    main()
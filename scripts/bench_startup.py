@@ -0,0 +1,60 @@
+"""
+Benchmark du temps d'import et de démarrage de l'API
+Usage: python -m scripts.bench_startup [--runs 5]
+
+Chaque mesure est faite dans un processus neuf (démarrage à froid) :
+- import : `import app.main`
+- démarrage : import + lifespan + première requête (/openapi.json)
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app.main
+from app.db import database
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    client.get("/openapi.json")
+    t2 = time.perf_counter()
+print(json.dumps({
+    "import": t1 - t0,
+    "startup": t2 - t0,
+    "engine_at_import": database._engine is not None,
+}))
+"""
+
+
+def measure() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    for key in ("import", "startup"):
+        values = [run[key] * 1000 for run in runs]
+        print(
+            f"{key:<10}: médiane {statistics.median(values):.0f} ms "
+            f"(min {min(values):.0f}, max {max(values):.0f})",
+        )
+    print(f"Engine SQLAlchemy créé à l'import : {runs[0]['engine_at_import']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Configuration des tests
+
+Les tests qui touchent la base (dialecte PostgreSQL : ON CONFLICT, upserts)
+tournent sur la base pointée par TEST_DATABASE_URL, et sont ignorés sinon.
+Les tables y sont recréées à chaque test.
+"""
+
+import os
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+# Settings minimales avant le premier import de app.config
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL or "postgresql://test@localhost/test"
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("ENVIRONMENT", "staging")  # Pas de log SQL
+
+import pytest  # noqa: E402
+
+from app.db.database import SessionLocal, create_tables, drop_tables  # noqa: E402
+from app.db.models import chess, puzzle, rating, user  # noqa: E402, F401
+
+from .fake_providers import FakeProviders  # noqa: E402
+
+
+@pytest.fixture
+def fake_providers() -> FakeProviders:
+    return FakeProviders()
+
+
+@pytest.fixture
+def db_tables():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL non défini")
+    drop_tables()
+    create_tables()
+    yield
+    drop_tables()
+
+
+@pytest.fixture
+def db(db_tables):
+    with SessionLocal() as session:
+        yield session
@@ -0,0 +1,163 @@
+"""
+Faux serveur Chess.com / Lichess pour les tests (httpx.MockTransport)
+
+Sert les archives mensuelles Chess.com avec ETag (304 si inchangées) et
+l'export NDJSON Lichess filtré par `since`. Les requêtes reçues sont
+enregistrées pour les assertions.
+"""
+
+import hashlib
+import json
+from collections import defaultdict
+from datetime import UTC, datetime
+from typing import Any
+
+import httpx
+
+from app.core.providers import ChessComClient, LichessClient
+
+CHESS_COM_URL = "https://chess-com.test/pub"
+LICHESS_URL = "https://lichess.test"
+
+SAMPLE_PGN = "1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 *"
+
+
+class FakeProviders:
+    def __init__(self) -> None:
+        self.chess_com_games: defaultdict[str, list[dict[str, Any]]] = defaultdict(
+            list,
+        )
+        self.lichess_games: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+        self.requests: list[httpx.Request] = []
+        self.not_modified = 0
+        self._next_id = 1
+
+    # Données
+
+    def _game_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def add_chess_com_game(
+        self,
+        white: str,
+        black: str,
+        end_time: datetime,
+        **extra: Any,
+    ) -> None:
+        game_id = self._game_id()
+        game = {
+            "url": f"https://www.chess.com/game/live/{game_id}",
+            # PGN distinct par partie : empreintes de contenu différentes
+            "pgn": f'[Event "{game_id}"]\n\n{SAMPLE_PGN}',
+            "end_time": int(end_time.timestamp()),
+            "time_class": "blitz",
+            "time_control": "180",
+            "rated": True,
+            "white": {"username": white, "rating": 1500, "result": "win"},
+            "black": {"username": black, "rating": 1450, "result": "resigned"},
+            **extra,
+        }
+        for name in {white.lower(), black.lower()}:
+            self.chess_com_games[name].append(game)
+
+    def add_lichess_game(self, white: str, black: str, end_time: datetime) -> None:
+        millis = int(end_time.timestamp() * 1000)
+        game = {
+            "id": f"li{self._game_id()}",
+            "rated": True,
+            "variant": "standard",
+            "speed": "rapid",
+            "createdAt": millis - 600_000,
+            "lastMoveAt": millis,
+            "status": "resign",
+            "winner": "white",
+            "pgn": SAMPLE_PGN,
+            "players": {
+                "white": {"user": {"name": white}, "rating": 1700},
+                "black": {"user": {"name": black}, "rating": 1650},
+            },
+        }
+        for name in {white.lower(), black.lower()}:
+            self.lichess_games[name].append(game)
+
+    # Serveur
+
+    def _json(self, request: httpx.Request, payload: Any) -> httpx.Response:
+        body = json.dumps(payload).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'  # noqa: S324
+        if request.headers.get("if-none-match") == etag:
+            self.not_modified += 1
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(
+            200,
+            content=body,
+            headers={"ETag": etag, "Content-Type": "application/json"},
+        )
+
+    def _chess_com(self, request: httpx.Request, parts: list[str]) -> httpx.Response:
+        # /pub/player/{user}/games/archives ou /pub/player/{user}/games/{y}/{m}
+        username = parts[2]
+        games = self.chess_com_games.get(username, [])
+        if parts[4] == "archives":
+            months = sorted(
+                {
+                    datetime.fromtimestamp(g["end_time"], UTC).strftime("%Y/%m")
+                    for g in games
+                },
+            )
+            base = f"{CHESS_COM_URL}/player/{username}/games"
+            return self._json(
+                request,
+                {"archives": [f"{base}/{month}" for month in months]},
+            )
+
+        month = f"{parts[4]}/{parts[5]}"
+        return self._json(
+            request,
+            {
+                "games": [
+                    g
+                    for g in games
+                    if datetime.fromtimestamp(g["end_time"], UTC).strftime("%Y/%m")
+                    == month
+                ],
+            },
+        )
+
+    def _lichess(self, request: httpx.Request, username: str) -> httpx.Response:
+        since = int(request.url.params.get("since", 0))
+        games = sorted(
+            (
+                g
+                for g in self.lichess_games.get(username.lower(), [])
+                if g["lastMoveAt"] >= since
+            ),
+            key=lambda g: g["lastMoveAt"],
+        )
+        body = "".join(json.dumps(g) + "\n" for g in games)
+        return httpx.Response(
+            200,
+            content=body.encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        parts = request.url.path.strip("/").split("/")
+        if request.url.host == "chess-com.test" and parts[:2] == ["pub", "player"]:
+            return self._chess_com(request, parts)
+        if request.url.host == "lichess.test" and parts[:3] == ["api", "games", "user"]:
+            return self._lichess(request, parts[3])
+        return httpx.Response(404)
+
+    def clients(self) -> dict[str, ChessComClient | LichessClient]:
+        transport = httpx.MockTransport(self.handler)
+        clients = [
+            ChessComClient(CHESS_COM_URL, transport=transport),
+            LichessClient(LICHESS_URL, transport=transport),
+        ]
+        return {client.name: client for client in clients}
+
+    def requests_to(self, host: str) -> list[httpx.Request]:
+        return [r for r in self.requests if r.url.host == host]
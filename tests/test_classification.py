@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from app.core.classification import classify_batch, classify_game
+
+# Demi-coups : 1-2 imprécisions, 3-4 erreurs, 5-6 gaffes (blancs puis noirs),
+# 7 coup brillant des blancs
+THRESHOLDS = [0, -60, 0, -120, 0, -200, 0, 300]
+
+
+def test_thresholds():
+    result = classify_game(THRESHOLDS)
+
+    assert result.is_inaccuracy.tolist() == [1, 1, 0, 0, 0, 0, 0]
+    assert result.is_mistake.tolist() == [0, 0, 1, 1, 0, 0, 0]
+    assert result.is_blunder.tolist() == [0, 0, 0, 0, 1, 1, 0]
+    assert result.is_brilliant.tolist() == [0, 0, 0, 0, 0, 0, 1]
+    assert result.blunders_count.tolist() == [2]
+
+
+def test_loss_is_counted_for_the_side_that_moved():
+    # Même chute d'évaluation : gaffe des blancs, bon coup des noirs
+    white_move = classify_game([0, -400])
+    black_move = classify_game([0, 0, -400])
+
+    assert white_move.is_blunder.tolist() == [True]
+    assert black_move.is_blunder.tolist() == [False, False]
+    assert black_move.is_brilliant.tolist() == [False, True]
+    assert black_move.win_loss[1] == pytest.approx(-white_move.win_loss[0])
+
+
+@pytest.mark.parametrize("evals", [[], [35]])
+def test_series_without_moves(evals):
+    result = classify_batch([evals, [0, -400]])
+
+    assert result.move_offsets.tolist() == [0, 0, 1]
+    assert np.isnan(result.accuracy_white[0])
+    assert np.isnan(result.accuracy_black[0])
+    assert result.blunders_count.tolist() == [0, 1]
+
+
+def test_empty_batch():
+    result = classify_batch([])
+    assert len(result) == 0
+    assert result.win_loss.size == 0
+
+
+def test_per_side_means_match_single_games():
+    games = [THRESHOLDS, [10, 20, -50, -40, -300], [0, -100]]
+    batch = classify_batch(games)
+
+    for i, evals in enumerate(games):
+        single = classify_game(evals)
+        start, end = batch.move_offsets[i], batch.move_offsets[i + 1]
+        assert batch.accuracy[start:end] == pytest.approx(single.accuracy)
+        assert batch.accuracy_white[i] == pytest.approx(single.accuracy[0::2].mean())
+        if len(evals) > 2:
+            expected = single.accuracy[1::2].mean()
+            assert batch.accuracy_black[i] == pytest.approx(expected)
+    # Un seul coup, des blancs : pas de moyenne pour les noirs
+    assert np.isnan(batch.accuracy_black[2])
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.db import database
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    engines = [create_engine(f"postgresql://replica{i}/db") for i in range(4)]
+    monkeypatch.setattr(database, "_replica_engines", engines)
+    return engines
+
+
+def test_read_session_stays_on_one_replica(replicas):
+    with database.read_session() as db:
+        first = db.get_bind()
+        assert first in replicas
+        assert all(db.get_bind() is first for _ in range(20))
+
+
+def test_write_session_uses_primary(replicas):
+    with database.SessionLocal() as db:
+        assert db.get_bind() is database.get_engine()
+
+
+@pytest.mark.parametrize("workers", [1, 2, 7, 8, 16, 40])
+def test_pool_limits_stay_within_connection_budget(workers):
+    pool_size, overflow = database.pool_limits_for_workers(workers, 40, 5)
+    assert pool_size >= 1
+    assert 0 <= overflow <= 5
+    assert workers * (pool_size + overflow) <= 40
+
+
+def test_pool_limits_keep_overflow_when_budget_allows():
+    assert database.pool_limits_for_workers(1, 40, 5) == (35, 5)
+
+
+def test_pool_limits_reject_more_workers_than_connections():
+    with pytest.raises(ValueError, match="DB_MAX_CONNECTIONS"):
+        database.pool_limits_for_workers(41, 40, 5)
+
+
+def test_write_in_request_sends_later_reads_to_primary(replicas):
+    token = database.request_routing.set({"primary_until": 0, "wrote": False})
+    try:
+        with database.read_session() as db:
+            assert db.get_bind() in replicas
+        database.request_routing.get()["wrote"] = True
+        with database.read_session() as db:
+            assert db.get_bind() is database.get_engine()
+    finally:
+        database.request_routing.reset(token)
+
+
+def test_recent_writer_is_remembered_per_user():
+    database.remember_write("alice@example.com", time.time() + 5)
+    assert database.primary_until_for("alice@example.com") > time.time()
+    assert database.primary_until_for("bob@example.com") == 0
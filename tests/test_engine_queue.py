@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.core.engine_queue import (
+    ERROR,
+    RESULT,
+    EngineJob,
+    EngineJobError,
+    LocalJobQueue,
+    NoWorkerError,
+    QueueFullError,
+    analyse,
+)
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+E4 = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+
+
+async def _alive_queue(max_jobs: int = 10) -> LocalJobQueue:
+    queue = LocalJobQueue(max_jobs)
+    await queue.heartbeat("worker-1", {"id": "worker-1"})
+    return queue
+
+
+async def _serve(queue: LocalJobQueue, handled: list[EngineJob], **message) -> None:
+    """Faux worker : répond à chaque job avec `message`"""
+    while True:
+        job = await queue.next_job(timeout=1)
+        if job is None:
+            continue
+        handled.append(job)
+        await asyncio.sleep(0.01)  # Laisser les autres clients s'abonner
+        await queue.publish(job, message or {"type": RESULT, "data": {"fen": job.fen}})
+
+
+def test_identical_requests_share_one_job():
+    async def run():
+        queue = await _alive_queue()
+        handled: list[EngineJob] = []
+        worker = asyncio.create_task(_serve(queue, handled))
+        try:
+            results = await asyncio.gather(
+                *(analyse(EngineJob(START, time_limit=0.1), queue) for _ in range(5)),
+            )
+        finally:
+            worker.cancel()
+        return results, handled
+
+    results, handled = asyncio.run(run())
+    assert results == [{"fen": START}] * 5
+    assert len(handled) == 1
+
+
+def test_cached_result_is_served_without_a_new_job():
+    async def run():
+        queue = await _alive_queue()
+        job = EngineJob(START, time_limit=0.1)
+        await queue.publish(job, {"type": RESULT, "data": {"cached": True}})
+        submitted = await queue.submit(job)
+        return submitted, await analyse(job, queue), await queue.depth()
+
+    submitted, result, depth = asyncio.run(run())
+    assert submitted is False
+    assert result == {"cached": True}
+    assert depth == 0
+
+
+def test_full_queue_still_lets_clients_join_a_pending_job():
+    async def run():
+        queue = await _alive_queue(max_jobs=1)
+        pending = EngineJob(START, time_limit=0.1)
+        assert await queue.submit(pending) is True
+        # Même job : rejoint, pas refusé
+        assert await queue.submit(EngineJob(START, time_limit=0.1)) is False
+        with pytest.raises(QueueFullError):
+            await queue.submit(EngineJob(E4, time_limit=0.1))
+
+    asyncio.run(run())
+
+
+def test_no_worker():
+    async def run():
+        await analyse(EngineJob(START), LocalJobQueue(10))
+
+    with pytest.raises(NoWorkerError):
+        asyncio.run(run())
+
+
+def test_timeout_without_result(monkeypatch):
+    monkeypatch.setattr(settings, "engine_job_timeout", 0.1)
+
+    async def run():
+        queue = await _alive_queue()  # Worker annoncé mais qui ne traite rien
+        await analyse(EngineJob(START), queue)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(run())
+
+
+def test_worker_error_is_raised_to_the_client():
+    async def run():
+        queue = await _alive_queue()
+        worker = asyncio.create_task(
+            _serve(queue, [], type=ERROR, error="Engine crashed"),
+        )
+        try:
+            await analyse(EngineJob(START), queue)
+        finally:
+            worker.cancel()
+
+    with pytest.raises(EngineJobError, match="Engine crashed"):
+        asyncio.run(run())
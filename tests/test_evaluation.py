@@ -0,0 +1,89 @@
+import subprocess
+import sys
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.core.evaluation import (
+    backfill_evaluations,
+    evaluation_columns,
+    parse_engine_evaluation,
+    unpack_evals,
+)
+from app.db.models.chess import ChessGame, GamePosition
+from app.db.models.user import User
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [None, 5, "x", {"evals": None}, {"evals": 5}, {"evals": [float("inf")]}],
+)
+def test_unreadable_evaluation_is_skipped(raw):
+    assert parse_engine_evaluation(raw) is None
+
+
+def test_raw_list_and_mate_scores():
+    evaluation = parse_engine_evaluation([35, {"cp": -12.4}, {"mate": -3}])
+    assert evaluation.evals == [35, -12, -9997]
+
+
+def test_extra_metadata_survives_normalization():
+    raw = {"engine": "sf16", "depth": 18, "evals": [20, -30], "best_moves": ["e2e4"]}
+    columns = evaluation_columns(parse_engine_evaluation(raw))
+    assert columns["engine_evaluation"] == {
+        "engine": "sf16",
+        "depth": 18,
+        "best_moves": ["e2e4"],
+    }
+    assert unpack_evals(columns["evals_packed"]).tolist() == [20, -30]
+
+
+def test_api_startup_does_not_load_numpy():
+    # Processus neuf : les autres tests ont déjà importé NumPy
+    code = "import sys, app.main; print('numpy' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_backfill_classifies_stored_positions(db):
+    white = User(email="w@example.com", username="w", hashed_password="x")
+    black = User(email="b@example.com", username="b", hashed_password="x")
+    db.add_all([white, black])
+    db.flush()
+    game = ChessGame(
+        white_player_id=white.id,
+        black_player_id=black.id,
+        game_date=datetime(2024, 1, 1, tzinfo=UTC),
+        result="0-1",
+        pgn="1. f3 e5 2. g4 Qh4# 0-1",
+        engine_evaluation={"evals": [20, -60, -50, -400, -10000]},
+    )
+    db.add(game)
+    db.flush()
+    db.add_all(
+        GamePosition(
+            game_id=game.id, move_number=(ply + 1) // 2, half_move=ply, fen="x"
+        )
+        for ply in range(1, 5)
+    )
+    db.commit()
+
+    assert backfill_evaluations(db) == 1
+
+    flags = db.execute(
+        select(GamePosition.half_move, GamePosition.is_blunder).order_by(
+            GamePosition.half_move
+        ),
+    ).all()
+    assert [tuple(row) for row in flags] == [
+        (1, False),
+        (2, False),
+        (3, True),
+        (4, False),
+    ]
@@ -0,0 +1,75 @@
+from datetime import UTC, datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.core import game_import
+from app.core.game_import import compute_content_hash, import_games, normalize_moves
+from app.db.models.chess import ChessGame
+from app.db.models.user import User
+
+DATE = datetime(2024, 1, 15, 12, tzinfo=UTC)
+
+PGN = '[Event "Live Chess"]\n[White "alice"]\n\n1. e4 e5 2. Nf3 Nc6 3. Bb5 1-0'
+REFORMATTED = """[Site "lichess.org"]
+[Black "bob"]
+
+1.e4 {ouverture} e5 (1... c5 2. Nf3)
+2.Nf3
+Nc6 3.Bb5 1-0
+"""
+
+
+def test_reformatted_pgn_gives_same_moves_and_hash():
+    moves = normalize_moves(PGN)
+    assert moves == ["e2e4", "e7e5", "g1f3", "b8c6", "f1b5"]
+    assert normalize_moves(REFORMATTED) == moves
+
+    assert compute_content_hash("Alice", "bob", DATE, moves) == compute_content_hash(
+        "alice",
+        "BOB",
+        DATE,
+        normalize_moves(REFORMATTED),
+    )
+
+
+def test_hash_compares_dates_in_utc():
+    moves = normalize_moves(PGN)
+    paris = DATE.astimezone(timezone(timedelta(hours=1)))
+    naive = DATE.replace(tzinfo=None)
+
+    expected = compute_content_hash(1, 2, DATE, moves)
+    assert compute_content_hash(1, 2, paris, moves) == expected
+    assert compute_content_hash(1, 2, naive, moves) == expected
+    assert compute_content_hash(2, 1, DATE, moves) != expected
+    assert compute_content_hash(1, 2, DATE, moves[:-1]) != expected
+
+
+def test_known_provider_ids_are_not_reparsed(db, monkeypatch):
+    white = User(email="w@example.com", username="w", hashed_password="x")
+    black = User(email="b@example.com", username="b", hashed_password="x")
+    db.add_all([white, black])
+    db.commit()
+
+    def row(game_id: str, pgn: str) -> dict:
+        return {
+            "chess_com_game_id": game_id,
+            "white_player_id": white.id,
+            "black_player_id": black.id,
+            "game_date": DATE,
+            "result": "1-0",
+            "pgn": pgn,
+        }
+
+    assert import_games(db, [row("1", PGN)]).inserted == 1
+
+    parsed = []
+    monkeypatch.setattr(
+        game_import,
+        "normalize_moves",
+        lambda pgn: parsed.append(pgn) or normalize_moves(pgn),
+    )
+    result = import_games(db, [row("1", PGN), row("2", "1. d4 d5 1/2-1/2")])
+
+    assert (result.inserted, result.skipped) == (1, 1)
+    assert parsed == ["1. d4 d5 1/2-1/2"]
+    assert len(db.execute(select(ChessGame.id)).all()) == 2
@@ -0,0 +1,42 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.router import position
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(position.router)
+    return TestClient(app)
+
+
+def test_apply_move_in_uci_or_san(client):
+    for move in ("e2e4", "e4"):
+        response = client.post("/position/apply", json={"fen": START, "move": move})
+        assert response.status_code == 200
+        assert response.json()["move"] == {"uci": "e2e4", "san": "e4"}
+
+
+@pytest.mark.parametrize("move", ["0000", "--", "e2e5", "Nf6"])
+def test_null_and_illegal_moves_are_rejected(client, move):
+    response = client.post("/position/apply", json={"fen": START, "move": move})
+    assert response.status_code == 400
+    assert response.json() == {"fen": START, "error": "Illegal move"}
+
+
+def test_single_and_batch_errors_share_one_shape(client):
+    single = client.post("/position/moves", json={"fen": "not a fen"})
+    batch = client.post(
+        "/position/moves/batch",
+        json={"positions": [{"fen": START}, {"fen": "not a fen"}]},
+    )
+    assert single.status_code == 400
+    assert batch.status_code == 200
+    assert (
+        single.json() == batch.json()[1] == {"fen": "not a fen", "error": "Invalid FEN"}
+    )
+    assert len(batch.json()[0]["legal_moves"]) == 20
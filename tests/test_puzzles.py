@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import event, select
+
+from app.config import settings
+from app.core import puzzles
+from app.core.evaluation import pack_evals
+from app.db.database import get_engine
+from app.db.models.chess import ChessGame, GamePosition
+from app.db.models.user import User
+
+# 1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6?? 4. Qxf7#
+PGN = "1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0"
+EVALS = [20, 30, 25, 10, 10, 40, 900, 10000]
+BLUNDER_FEN = "r1bqkbnr/pppp1ppp/2n5/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR b KQkq - 3 3"
+
+
+def _candidate(game_id: int, fen: str = BLUNDER_FEN) -> puzzles.Candidate:
+    return puzzles.Candidate(game_id, 1, 6, fen, 1500)
+
+
+def test_verify_all_keeps_games_with_failed_candidates(monkeypatch):
+    def fake_verify(fen):
+        if fen == "crash":
+            msg = "engine process died unexpectedly"
+            raise puzzles.VerificationError(msg)
+        return {"solution": "e2e4", "theme": "advantage", "length": 1}
+
+    monkeypatch.setattr(puzzles, "verify_candidate", fake_verify)
+    candidates = [_candidate(1), _candidate(2, "crash"), _candidate(2)]
+    with ThreadPoolExecutor(2) as pool:
+        verified, failed = puzzles._verify_all(pool, candidates)
+
+    assert verified[1] is None
+    assert verified[0] == verified[2] is not None
+    assert failed == {2}
+
+
+def test_verify_all_aborts_when_engine_is_unavailable(monkeypatch):
+    def fake_verify(fen):
+        msg = "Moteur indisponible"
+        raise puzzles.EngineUnavailableError(msg)
+
+    monkeypatch.setattr(puzzles, "verify_candidate", fake_verify)
+    with ThreadPoolExecutor(2) as pool, pytest.raises(puzzles.EngineUnavailableError):
+        puzzles._verify_all(pool, [_candidate(1), _candidate(2)])
+
+
+def _games(db, count: int = 1) -> list[ChessGame]:
+    white = User(email="w@example.com", username="w", hashed_password="x")
+    black = User(email="b@example.com", username="b", hashed_password="x")
+    db.add_all([white, black])
+    db.flush()
+    games = [
+        ChessGame(
+            white_player_id=white.id,
+            black_player_id=black.id,
+            game_date=datetime(2024, 1, day, tzinfo=UTC),
+            result="1-0",
+            pgn=PGN,
+            evals_packed=pack_evals(EVALS),
+        )
+        for day in range(1, count + 1)
+    ]
+    db.add_all(games)
+    db.commit()
+    return games
+
+
+def test_candidate_fens_are_fetched_in_one_query(db):
+    stored, replayed = _games(db, 2)
+    db.add(GamePosition(game_id=stored.id, move_number=3, half_move=5, fen="stored"))
+    db.commit()
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        if "game_positions" in statement:
+            statements.append(statement)
+
+    engine = get_engine()
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        candidates = puzzles.find_candidates(
+            db,
+            [stored, replayed],
+            {stored.black_player_id},
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert len(statements) == 1
+    assert [(c.game_id, c.ply, c.fen) for c in candidates] == [
+        (stored.id, 6, "stored"),
+        (replayed.id, 6, BLUNDER_FEN),
+    ]
+
+
+def test_missing_engine_leaves_games_to_process(db, monkeypatch):
+    _games(db)
+
+    monkeypatch.setattr(settings, "stockfish_path", "/nonexistent/stockfish")
+    with pytest.raises(puzzles.EngineUnavailableError):
+        puzzles.extract_puzzles(db, max_workers=1)
+
+    db.rollback()
+    assert db.scalar(select(ChessGame.puzzles_extracted)) is not True
@@ -0,0 +1,123 @@
+from datetime import UTC, date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, false, select
+
+from app.core import rating_history
+from app.core.rating_history import (
+    aggregate_ratings,
+    bucket_start,
+    rebuild_rating_history,
+    update_rating_history,
+)
+from app.db.models.chess import ChessGame
+from app.db.models.rating import RatingBucket
+from app.db.models.user import User
+
+# Mercredi
+DATE = datetime(2024, 1, 17, 12, tzinfo=UTC)
+
+
+def _game(white_rating, black_rating, game_date=DATE, **columns) -> dict:
+    return {
+        "white_player_id": 1,
+        "black_player_id": 2,
+        "white_player_rating": white_rating,
+        "black_player_rating": black_rating,
+        "game_date": game_date,
+        "time_class": "blitz",
+        **columns,
+    }
+
+
+@pytest.mark.parametrize(
+    ("bucket", "expected"),
+    [
+        ("day", date(2024, 1, 17)),
+        ("week", date(2024, 1, 15)),
+        ("month", date(2024, 1, 1)),
+    ],
+)
+def test_bucket_start(bucket, expected):
+    assert bucket_start(bucket, DATE) == expected
+
+
+def test_bucket_start_uses_utc_day():
+    # 00:30 à UTC+2, encore la veille en UTC
+    local = datetime(2024, 1, 1, 0, 30, tzinfo=timezone(timedelta(hours=2)))
+    assert bucket_start("day", local) == date(2023, 12, 31)
+    assert bucket_start("month", local) == date(2023, 12, 1)
+
+
+def test_aggregate_keeps_last_rating_by_date_and_extremes():
+    games = [
+        _game(1510, 1400, DATE + timedelta(hours=2)),
+        _game(1490, 1420, DATE),
+        _game(1550, 1410, DATE + timedelta(hours=1)),
+    ]
+    rows = aggregate_ratings(games, {1})
+
+    assert {row["bucket"] for row in rows} == {"day", "week", "month"}
+    for row in rows:
+        assert row["user_id"] == 1
+        assert row["last_rating"] == 1510
+        assert row["last_game_date"] == DATE + timedelta(hours=2)
+        assert (row["min_rating"], row["max_rating"]) == (1490, 1550)
+        assert row["games_count"] == 3
+
+
+def test_aggregate_skips_unrated_games_and_missing_ratings():
+    games = [
+        _game(1500, 1500),
+        _game(1800, 1800, rated=False),
+        _game(None, 1600, time_class=None),
+    ]
+    rows = {
+        (row["user_id"], row["time_class"], row["bucket"]): row
+        for row in aggregate_ratings(games)
+    }
+
+    assert rows[1, "blitz", "day"]["games_count"] == 1
+    assert rows[1, "blitz", "day"]["max_rating"] == 1500
+    assert (1, "unknown", "day") not in rows
+    assert rows[2, "unknown", "day"]["last_rating"] == 1600
+
+
+def test_rebuild_overwrites_buckets_recreated_concurrently(db, monkeypatch):
+    white = User(email="w@example.com", username="w", hashed_password="x")
+    black = User(email="b@example.com", username="b", hashed_password="x")
+    db.add_all([white, black])
+    db.flush()
+    games = [
+        {
+            "white_player_id": white.id,
+            "black_player_id": black.id,
+            "white_player_rating": rating,
+            "black_player_rating": 1500,
+            "game_date": DATE + timedelta(hours=hour),
+            "time_class": "blitz",
+            "result": "1-0",
+            "pgn": "1. e4 1-0",
+        }
+        for hour, rating in enumerate([1500, 1520])
+    ]
+    db.execute(ChessGame.__table__.insert(), games)
+    update_rating_history(db, games[:1])
+    db.commit()
+
+    # Un import concurrent a recréé le bucket après la suppression
+    monkeypatch.setattr(
+        rating_history,
+        "delete",
+        lambda model: delete(model).where(false()),
+    )
+    rebuild_rating_history(db, white.id)
+
+    day = db.execute(
+        select(RatingBucket).where(
+            RatingBucket.user_id == white.id,
+            RatingBucket.bucket == "day",
+        ),
+    ).scalar_one()
+    assert (day.last_rating, day.min_rating, day.max_rating) == (1520, 1500, 1520)
+    assert day.games_count == 2
@@ -0,0 +1,270 @@
+import asyncio
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.core import sync
+from app.core.game_import import import_games
+from app.core.sync import (
+    SYNC_OVERLAP,
+    SyncScheduler,
+    claim_placeholders,
+    get_watermark,
+    resolve_players,
+)
+from app.db.database import SessionLocal
+from app.db.models.chess import ChessGame
+from app.db.models.user import User
+
+from .fake_providers import CHESS_COM_URL, FakeProviders
+
+JAN = datetime(2024, 1, 15, 12, tzinfo=UTC)
+FEB = datetime(2024, 2, 15, 12, tzinfo=UTC)
+
+
+def _user(db, username: str, **links) -> User:
+    user = User(
+        email=f"{username}@example.com",
+        username=username,
+        hashed_password="x",
+        **links,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _sync(fake: FakeProviders, user: User, provider: str) -> int:
+    async def run():
+        scheduler = SyncScheduler(clients=fake.clients(), session_factory=SessionLocal)
+        try:
+            client = scheduler.clients[provider]
+            username = getattr(user, client.username_attr)
+            result = await scheduler.sync_account(user.id, username, client)
+        finally:
+            await scheduler.aclose()
+        return result.inserted
+
+    return asyncio.run(run())
+
+
+def _games_of(db, user_id: int) -> int:
+    return len(
+        db.execute(
+            select(ChessGame.id).where(
+                (ChessGame.white_player_id == user_id)
+                | (ChessGame.black_player_id == user_id),
+            ),
+        ).all(),
+    )
+
+
+# Clients HTTP seuls (sans base)
+
+
+def test_chess_com_reuses_archives_on_304(fake_providers):
+    fake_providers.add_chess_com_game("alice", "bob", JAN)
+    fake_providers.add_chess_com_game("alice", "carol", FEB)
+    client = fake_providers.clients()["chess_com"]
+
+    async def collect():
+        rows = [row async for row in client.iter_games("Alice", None)]
+        client.confirm_validators("Alice")  # Sync réussie
+        return rows
+
+    async def run():
+        try:
+            return await collect(), await collect()
+        finally:
+            await client.aclose()
+
+    first, second = asyncio.run(run())
+
+    assert {row["black_username"] for row in first} == {"bob", "carol"}
+    # Rien de nouveau : archives et mois répondent 304, aucune partie relue
+    assert second == []
+    assert fake_providers.not_modified == 3
+    archives = f"{CHESS_COM_URL}/player/alice/games/archives"
+    conditional = [
+        r
+        for r in fake_providers.requests
+        if str(r.url) == archives and "if-none-match" in r.headers
+    ]
+    assert len(conditional) == 1
+
+
+def test_chess_com_new_game_in_current_month_after_304(fake_providers):
+    fake_providers.add_chess_com_game("alice", "bob", FEB)
+    client = fake_providers.clients()["chess_com"]
+
+    async def run():
+        try:
+            _ = [row async for row in client.iter_games("alice", None)]
+            client.confirm_validators("alice")
+            # Même liste d'archives (304) mais nouvelle partie dans le mois
+            fake_providers.add_chess_com_game("alice", "carol", FEB + timedelta(1))
+            return [row async for row in client.iter_games("alice", None)]
+        finally:
+            await client.aclose()
+
+    rows = asyncio.run(run())
+    assert {row["black_username"] for row in rows} == {"bob", "carol"}
+
+
+def test_lichess_passes_since_in_milliseconds(fake_providers):
+    fake_providers.add_lichess_game("alice", "bob", JAN)
+    fake_providers.add_lichess_game("alice", "bob", FEB)
+    client = fake_providers.clients()["lichess"]
+
+    async def run():
+        try:
+            return [row async for row in client.iter_games("alice", FEB)]
+        finally:
+            await client.aclose()
+
+    rows = asyncio.run(run())
+    assert [row["game_date"] for row in rows] == [FEB]
+    assert fake_providers.requests[-1].url.params["since"] == str(
+        int(FEB.timestamp() * 1000),
+    )
+
+
+# Synchronisation (PostgreSQL)
+
+
+def test_failed_import_rereads_archives_next_time(db, fake_providers, monkeypatch):
+    fake_providers.add_chess_com_game("alice", "bob", JAN)
+    alice = _user(db, "alice", chess_com_username="alice")
+
+    import_batch = sync._import_batch
+    failures = [RuntimeError("database unavailable")]
+
+    def flaky_import(*args):
+        if failures:
+            raise failures.pop()
+        return import_batch(*args)
+
+    monkeypatch.setattr(sync, "_import_batch", flaky_import)
+
+    async def run():
+        scheduler = SyncScheduler(
+            clients=fake_providers.clients(),
+            session_factory=SessionLocal,
+        )
+        client = scheduler.clients["chess_com"]
+        try:
+            with pytest.raises(RuntimeError):
+                await scheduler.sync_account(alice.id, "alice", client)
+            return await scheduler.sync_account(alice.id, "alice", client)
+        finally:
+            await scheduler.aclose()
+
+    # Pas de 304 sur le mois dont l'import a échoué
+    assert asyncio.run(run()).inserted == 1
+    assert fake_providers.not_modified == 0
+    assert _games_of(db, alice.id) == 1
+
+
+def test_watermark_ignores_games_imported_by_other_accounts(db, fake_providers):
+    fake_providers.add_lichess_game("alice", "bob", JAN)
+    fake_providers.add_lichess_game("bob", "alice", FEB)
+    fake_providers.add_lichess_game("alice", "carol", JAN - timedelta(days=30))
+
+    bob = _user(db, "bob", lichess_username="bob")
+    assert _sync(fake_providers, bob, "lichess") == 2
+
+    # Alice lie son compte après coup : toute son histoire est relue
+    alice = _user(db, "alice", lichess_username="Alice")
+    client = fake_providers.clients()["lichess"]
+    assert get_watermark(db, alice.id, client) is None
+    _sync(fake_providers, alice, "lichess")
+
+    first_request = fake_providers.requests_to("lichess.test")[-1]
+    assert "since" not in first_request.url.params
+    assert _games_of(db, alice.id) == 3
+
+    # Les syncs suivantes repartent du watermark propre au compte
+    db.expire_all()
+    watermark = get_watermark(db, alice.id, client)
+    assert watermark is not None
+    _sync(fake_providers, alice, "lichess")
+    since = int(fake_providers.requests_to("lichess.test")[-1].url.params["since"])
+    assert since == int((watermark - SYNC_OVERLAP).timestamp() * 1000)
+
+
+def test_placeholder_games_move_to_user_who_links_the_name(db, fake_providers):
+    fake_providers.add_chess_com_game("bob", "alice", JAN)
+    bob = _user(db, "bob", chess_com_username="bob")
+    _sync(fake_providers, bob, "chess_com")
+
+    placeholder = db.execute(
+        select(User).where(User.chess_com_username == "alice"),
+    ).scalar_one()
+    assert placeholder.is_active is False
+    assert _games_of(db, placeholder.id) == 1
+
+    alice = _user(db, "alice", chess_com_username="Alice")
+    client = fake_providers.clients()["chess_com"]
+    # Le compte réel l'emporte sur le fantôme dès la résolution des pseudos
+    assert resolve_players(db, client, {"ALICE"}) == {"alice": alice.id}
+
+    placeholder_id = placeholder.id
+    _sync(fake_providers, alice, "chess_com")
+    assert _games_of(db, alice.id) == 1
+    assert db.scalar(select(User.id).where(User.id == placeholder_id)) is None
+
+
+def test_claimed_duplicate_of_own_game_is_deleted(db, fake_providers):
+    client = fake_providers.clients()["chess_com"]
+    bob = _user(db, "bob", chess_com_username="bob")
+    placeholder_id = resolve_players(db, client, {"alice"})["alice"]
+    alice = _user(db, "alice", chess_com_username="Alice")
+
+    game = {
+        "black_player_id": bob.id,
+        "game_date": JAN,
+        "result": "1-0",
+        "pgn": "1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0",
+    }
+    # La même partie, sous le fantôme et déjà sous le compte d'Alice
+    import_games(db, [{**game, "white_player_id": placeholder_id}])
+    import_games(db, [{**game, "white_player_id": alice.id}])
+
+    assert claim_placeholders(db, alice.id, client) == 0
+    assert _games_of(db, alice.id) == 1
+    assert db.scalar(select(func.count()).select_from(ChessGame)) == 1
+
+
+def _wait_for_lock_wait(db, timeout: float = 10.0) -> None:
+    """Attendre qu'une autre transaction soit bloquée sur un verrou"""
+    deadline = time.monotonic() + timeout
+    query = text("SELECT count(*) FROM pg_locks WHERE NOT granted")
+    while not db.execute(query).scalar():
+        assert time.monotonic() < deadline, "aucune transaction en attente"
+        time.sleep(0.01)
+
+
+def test_concurrent_syncs_share_one_placeholder(db_tables, fake_providers):
+    client = fake_providers.clients()["chess_com"]
+    ids = {}
+
+    with SessionLocal() as first:
+        ids["first"] = resolve_players(first, client, {"dave"})["dave"]
+
+        # Bloquée sur l'index unique jusqu'au commit de la première
+        def second_sync():
+            with SessionLocal() as second:
+                ids["second"] = resolve_players(second, client, {"Dave"})["dave"]
+                second.commit()
+
+        thread = threading.Thread(target=second_sync)
+        thread.start()
+        _wait_for_lock_wait(first)
+        assert "second" not in ids
+        first.commit()
+        thread.join(timeout=5)
+
+    assert ids["first"] == ids["second"]